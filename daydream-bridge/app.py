@@ -26,7 +26,7 @@ except ImportError:
     import numpy as np
 
 from daydream_api import DaydreamAPI, StreamConfig, StreamInfo
-from web_server import DaydreamServer, find_free_port
+from web_server import DaydreamServer, find_free_ports
 
 # Try to import NDI
 NDI_AVAILABLE = False
@@ -141,9 +141,7 @@ class DaydreamBridge:
         self.stream: Optional[StreamInfo] = None
         
         # Server ports
-        self.http_port = find_free_port()
-        self.sdp_port = find_free_port()
-        self.auth_port = find_free_port()
+        self.http_port, self.sdp_port, self.auth_port = find_free_ports(3)
         
         # Servers
         self.server: Optional[DaydreamServer] = None
@@ -160,6 +158,12 @@ class DaydreamBridge:
         # NDI
         self.ndi_receiver = NDIReceiver(ndi_client) if NDI_AVAILABLE else None
         self.ndi_sources = []
+        self._ndi_sources_rev = 0  # Bumped whenever ndi_sources is replaced
+    
+    @property
+    def ndi_sources_rev(self) -> int:
+        """Revision of ndi_sources, bumped each time a scan replaces the list"""
+        return self._ndi_sources_rev
     
     def start(self, open_browser: bool = True, use_cli: bool = False):
         """Start the bridge"""
@@ -292,6 +296,7 @@ class DaydreamBridge:
         
         # Final scan to get all discovered sources
         self.ndi_sources = self.ndi_receiver.find_sources(timeout_ms=1000)
+        self._ndi_sources_rev += 1
         
         if self.ndi_sources:
             print(f"Found {len(self.ndi_sources)} source(s):")
@@ -569,7 +574,8 @@ class DaydreamBridge:
                 else:
                     frame = self._generate_test_frame()
                 
-                if frame is not None:
+                # Nobody to send to (relay page not open): skip resize + JPEG
+                if frame is not None and self.server.ws_clients:
                     # Resize to 512x512 preserving aspect ratio (letterbox)
                     frame = self._resize_with_letterbox(frame, 512, 512)
                     
@@ -3,17 +3,97 @@ Scope WebRTC Client
 Connects to a Daydream Scope instance (local or RunPod) via WebRTC
 """
 
+import copy
+import functools
+import gzip
+import http.client
 import json
 import logging
+import socket
 import ssl
+import time
 from typing import Optional, Callable, Dict, Any
 from dataclasses import dataclass, field
 
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# How long ICE server / pipeline discovery results are reused (seconds)
+DISCOVERY_CACHE_TTL = 300
+
+# Used when Scope's ICE server configuration can't be fetched
+DEFAULT_ICE_SERVERS = [{"urls": ["stun:stun.l.google.com:19302"]}]
+
+def _is_gzipped(resp) -> bool:
+    return resp.headers.get("Content-Encoding", "").lower() == "gzip"
+
+
+def _read_body(resp) -> bytes:
+    """Read a response body, undoing gzip Content-Encoding (urllib doesn't)"""
+    body = resp.read()
+    return gzip.decompress(body) if _is_gzipped(resp) else body
+
+
+def _read_json(resp):
+    """Parse a JSON response body (orjson parses the bytes without a decoded str copy)"""
+    body = _read_body(resp)
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def _tune_socket(sock: socket.socket):
+    """Disable Nagle so small JSON requests go out without waiting for an ACK"""
+    # No keepalive options: urllib sends Connection: close and opens a new
+    # connection for every request, so there is no idle connection to keep
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class TunedHTTPConnection(http.client.HTTPConnection):
+    def connect(self):
+        super().connect()
+        _tune_socket(self.sock)
+
+
+class TunedHTTPSConnection(http.client.HTTPSConnection):
+    def connect(self):
+        super().connect()
+        _tune_socket(self.sock)
+
+
+class TunedHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(TunedHTTPConnection, req)
+
+
+class TunedHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(TunedHTTPSConnection, req, context=self._context)
+
+
+def ttl_cache(ttl: float):
+    """Cache a ScopeClient method's result on the instance for `ttl` seconds.
+    
+    Exceptions are not cached, so a failed call is retried next time.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cached = self._cache.get(method.__name__)
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+            value = method(self, *args, **kwargs)
+            self._cache[method.__name__] = (value, time.monotonic() + ttl)
+            return value
+        return wrapper
+    return decorator
+
 
 @dataclass
 class ScopeConfig:
@@ -28,6 +108,46 @@ class ScopeConfig:
     # Resolution (defaults for Krea: 256x256 for video mode)
     width: int = 512
     height: int = 512
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Normalize prompts once on assignment instead of on every offer
+        if name == "prompts":
+            super().__setattr__("_formatted_prompts", self._normalize_prompts(value))
+    
+    @staticmethod
+    def _normalize_prompts(prompts) -> list:
+        """Convert prompts to PromptItem format: [{"text": "...", "weight": 1.0}]"""
+        if isinstance(prompts, str):
+            return [{"text": prompts, "weight": 1.0}]
+        
+        formatted_prompts = []
+        if isinstance(prompts, list):
+            for p in prompts:
+                if isinstance(p, str):
+                    formatted_prompts.append({"text": p, "weight": 1.0})
+                elif isinstance(p, dict):
+                    formatted_prompts.append(p)
+        return formatted_prompts
+    
+    def as_offer_params(self, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the offer's initialParameters, applying per-call overrides"""
+        prompts = self._formatted_prompts
+        if "prompts" in overrides:
+            prompts = self._normalize_prompts(overrides["prompts"])
+        
+        return {
+            "input_mode": self.input_mode,
+            "prompts": prompts,
+            "negative_prompt": overrides.get("negative_prompt", self.negative_prompt),
+            "denoising_step_list": self.denoising_step_list,
+            "guidance_scale": overrides.get("guidance_scale", self.guidance_scale),
+            "noise_scale": 0.7,  # Required for video mode
+            "noise_controller": True,  # Enable automatic noise adjustment
+            "width": self.width,
+            "height": self.height,
+            "pipeline_ids": [overrides.get("pipeline_id", self.pipeline_id)],  # Specify which pipeline to use
+        }
 
 
 class ScopeClient:
@@ -54,41 +174,66 @@ class ScopeClient:
         self.session_id: Optional[str] = None
         self.connected = False
         self._on_frame_callback: Optional[Callable] = None
+        self._cache: Dict[str, tuple] = {}
+        self._owns_cache = True  # False for session() copies sharing the parent's
+        
+        # Built once and shared by every request (urllib copies request headers)
+        self._ssl_ctx = self._build_ssl_context()
+        self._hdrs = self._build_headers()
+        self._opener = urllib.request.build_opener(
+            TunedHTTPHandler(),
+            TunedHTTPSHandler(context=self._ssl_ctx),
+        )
         
+    def session(self) -> "ScopeClient":
+        """A client for one more WebRTC session, sharing this one's opener and discovery cache"""
+        client = copy.copy(self)
+        client.config = copy.deepcopy(self.config)
+        client._owns_cache = False
+        client.session_id = None
+        client.connected = False
+        return client
+    
     def get_api_url(self, endpoint: str) -> str:
         """Get full API URL for an endpoint"""
         return f"{self.scope_url}/api/v1{endpoint}"
     
-    def _get_ssl_context(self):
-        """Get SSL context that skips verification (for RunPod proxies)"""
+    def _build_ssl_context(self):
+        """Build SSL context that skips verification (for RunPod proxies)"""
         ssl_ctx = ssl.create_default_context()
         ssl_ctx.check_hostname = False
         ssl_ctx.verify_mode = ssl.CERT_NONE
         return ssl_ctx
     
-    def _get_headers(self) -> dict:
-        """Get headers required for RunPod proxy (needs Referer header)"""
+    def _build_headers(self) -> dict:
+        """Build headers required for RunPod proxy (needs Referer header)"""
         return {
             "Accept": "application/json",
             "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
             "Referer": f"{self.scope_url}/",
             "Origin": self.scope_url,
             "User-Agent": "DaydreamBridge/1.0",
         }
     
+    @ttl_cache(DISCOVERY_CACHE_TTL)
+    def _fetch_ice_servers(self) -> list:
+        url = self.get_api_url("/webrtc/ice-servers")
+        req = urllib.request.Request(url, headers=self._hdrs)
+        
+        with self._opener.open(req, timeout=10) as resp:
+            data = _read_json(resp)
+            return data.get("iceServers", [])
+    
     def get_ice_servers(self) -> list:
-        """Get ICE server configuration from Scope"""
+        """Get ICE server configuration from Scope (a copy the caller may modify)"""
         try:
-            url = self.get_api_url("/webrtc/ice-servers")
-            req = urllib.request.Request(url, headers=self._get_headers())
-            
-            with urllib.request.urlopen(req, timeout=10, context=self._get_ssl_context()) as resp:
-                data = json.loads(resp.read().decode())
-                return data.get("iceServers", [])
+            # The cached list is shared by every caller of this client
+            return copy.deepcopy(self._fetch_ice_servers())
         except Exception as e:
             logger.warning(f"Failed to get ICE servers: {e}")
             # Return default STUN server
-            return [{"urls": ["stun:stun.l.google.com:19302"]}]
+            return copy.deepcopy(DEFAULT_ICE_SERVERS)
     
     def send_offer(self, sdp: str, sdp_type: str = "offer", initial_params: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -104,40 +249,7 @@ class ScopeClient:
         """
         url = self.get_api_url("/webrtc/offer")
         
-        # Build initial parameters from config
-        # Convert prompts to PromptItem format: [{"text": "...", "weight": 1.0}]
-        prompts = self.config.prompts
-        if initial_params and "prompts" in initial_params:
-            prompts = initial_params["prompts"]
-        
-        # Convert string prompts to PromptItem format
-        formatted_prompts = []
-        if isinstance(prompts, list):
-            for p in prompts:
-                if isinstance(p, str):
-                    formatted_prompts.append({"text": p, "weight": 1.0})
-                elif isinstance(p, dict):
-                    formatted_prompts.append(p)
-        elif isinstance(prompts, str):
-            formatted_prompts.append({"text": prompts, "weight": 1.0})
-        
-        # Get pipeline_id from params or config
-        pipeline_id = self.config.pipeline_id
-        if initial_params and "pipeline_id" in initial_params:
-            pipeline_id = initial_params["pipeline_id"]
-        
-        params = {
-            "input_mode": self.config.input_mode,
-            "prompts": formatted_prompts,
-            "negative_prompt": initial_params.get("negative_prompt", self.config.negative_prompt) if initial_params else self.config.negative_prompt,
-            "denoising_step_list": self.config.denoising_step_list,
-            "guidance_scale": initial_params.get("guidance_scale", self.config.guidance_scale) if initial_params else self.config.guidance_scale,
-            "noise_scale": 0.7,  # Required for video mode
-            "noise_controller": True,  # Enable automatic noise adjustment
-            "width": self.config.width,
-            "height": self.config.height,
-            "pipeline_ids": [pipeline_id],  # Specify which pipeline to use
-        }
+        params = self.config.as_offer_params(initial_params or {})
         
         payload = {
             "sdp": sdp,
@@ -146,37 +258,37 @@ class ScopeClient:
         }
         
         data = json.dumps(payload).encode('utf-8')
-        headers = self._get_headers()
         req = urllib.request.Request(
             url,
             data=data,
-            headers=headers,
+            headers=self._hdrs,
             method="POST"
         )
         
-        ssl_ctx = self._get_ssl_context()
         try:
-            with urllib.request.urlopen(req, timeout=30, context=ssl_ctx) as resp:
-                answer = json.loads(resp.read().decode())
+            with self._opener.open(req, timeout=30) as resp:
+                answer = _read_json(resp)
                 self.session_id = answer.get("sessionId")
                 self.connected = True
                 logger.info(f"Connected to Scope, session: {self.session_id}")
                 return answer
         except urllib.error.HTTPError as e:
-            err_body = e.read().decode()
+            err_body = _read_body(e).decode()
             logger.error(f"Scope offer failed ({e.code}): {err_body}")
             raise
         except Exception as e:
             logger.error(f"Scope offer failed: {e}")
             raise
     
-    def send_ice_candidate(self, candidate: str, sdp_mid: str, sdp_mline_index: int):
-        """Send ICE candidate to Scope"""
-        if not self.session_id:
+    def send_ice_candidate(self, candidate: str, sdp_mid: str, sdp_mline_index: int,
+                           session_id: Optional[str] = None):
+        """Send ICE candidate to Scope (for session_id, or this client's session)"""
+        session_id = session_id or self.session_id
+        if not session_id:
             logger.warning("No session ID, cannot send ICE candidate")
             return
         
-        url = self.get_api_url(f"/webrtc/offer/{self.session_id}")
+        url = self.get_api_url(f"/webrtc/offer/{session_id}")
         
         payload = {
             "candidates": [{
@@ -187,17 +299,15 @@ class ScopeClient:
         }
         
         data = json.dumps(payload).encode('utf-8')
-        headers = self._get_headers()
         req = urllib.request.Request(
             url,
             data=data,
-            headers=headers,
+            headers=self._hdrs,
             method="PATCH"
         )
         
-        ssl_ctx = self._get_ssl_context()
         try:
-            with urllib.request.urlopen(req, timeout=10, context=ssl_ctx) as resp:
+            with self._opener.open(req, timeout=10) as resp:
                 pass
         except Exception as e:
             logger.warning(f"Failed to send ICE candidate: {e}")
@@ -215,14 +325,13 @@ class ScopeClient:
     
     def check_connection(self) -> bool:
         """Check if Scope is reachable"""
-        ssl_ctx = self._get_ssl_context()
-        headers = self._get_headers()
+        headers = self._hdrs
         
         # Try the health endpoint first (Scope uses /health, not /api/v1/health)
         try:
             url = f"{self.scope_url}/health"
             req = urllib.request.Request(url, headers=headers, method="GET")
-            with urllib.request.urlopen(req, timeout=10, context=ssl_ctx) as resp:
+            with self._opener.open(req, timeout=10) as resp:
                 return resp.status == 200
         except Exception as e:
             logger.warning(f"Health check failed: {e}")
@@ -231,7 +340,7 @@ class ScopeClient:
         try:
             url = self.get_api_url("/webrtc/ice-servers")
             req = urllib.request.Request(url, headers=headers, method="GET")
-            with urllib.request.urlopen(req, timeout=10, context=ssl_ctx) as resp:
+            with self._opener.open(req, timeout=10) as resp:
                 return resp.status == 200
         except Exception as e:
             logger.warning(f"ICE servers check failed: {e}")
@@ -240,7 +349,7 @@ class ScopeClient:
         try:
             url = self.get_api_url("/pipeline/status")
             req = urllib.request.Request(url, headers=headers, method="GET")
-            with urllib.request.urlopen(req, timeout=10, context=ssl_ctx) as resp:
+            with self._opener.open(req, timeout=10) as resp:
                 return resp.status == 200
         except Exception as e:
             logger.warning(f"Pipeline status check failed: {e}")
@@ -248,22 +357,26 @@ class ScopeClient:
         # Try the main page as last resort
         try:
             req = urllib.request.Request(self.scope_url, headers=headers, method="GET")
-            with urllib.request.urlopen(req, timeout=10, context=ssl_ctx) as resp:
+            with self._opener.open(req, timeout=10) as resp:
                 return resp.status == 200
         except Exception as e:
             logger.warning(f"Main page check failed: {e}")
             return False
     
+    @ttl_cache(DISCOVERY_CACHE_TTL)
+    def _fetch_pipelines(self) -> list:
+        url = self.get_api_url("/pipelines/schemas")
+        req = urllib.request.Request(url, headers=self._hdrs)
+        with self._opener.open(req, timeout=10) as resp:
+            data = _read_json(resp)
+            # Returns dict with pipeline_id as keys
+            pipelines = data.get("pipelines", {})
+            return list(pipelines.keys())
+    
     def get_pipelines(self) -> list:
         """Get available pipelines from Scope"""
         try:
-            url = self.get_api_url("/pipelines/schemas")
-            req = urllib.request.Request(url, headers=self._get_headers())
-            with urllib.request.urlopen(req, timeout=10, context=self._get_ssl_context()) as resp:
-                data = json.loads(resp.read().decode())
-                # Returns dict with pipeline_id as keys
-                pipelines = data.get("pipelines", {})
-                return list(pipelines.keys())
+            return self._fetch_pipelines()
         except Exception as e:
             logger.warning(f"Failed to get pipelines: {e}")
             return []
@@ -276,16 +389,14 @@ class ScopeClient:
                 "pipeline_ids": [pipeline_id]
             }
             data = json.dumps(payload).encode('utf-8')
-            headers = self._get_headers()
-            req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+            req = urllib.request.Request(url, data=data, headers=self._hdrs, method="POST")
             
-            ssl_ctx = self._get_ssl_context()
-            with urllib.request.urlopen(req, timeout=30, context=ssl_ctx) as resp:
-                result = json.loads(resp.read().decode())
+            with self._opener.open(req, timeout=30) as resp:
+                result = _read_json(resp)
                 logger.info(f"Pipeline load initiated: {result}")
                 return True
         except urllib.error.HTTPError as e:
-            err_body = e.read().decode()
+            err_body = _read_body(e).decode()
             logger.error(f"Failed to load pipeline ({e.code}): {err_body}")
             return False
         except Exception as e:
@@ -296,18 +407,16 @@ class ScopeClient:
         """Get current pipeline status from Scope"""
         try:
             url = self.get_api_url("/pipeline/status")
-            req = urllib.request.Request(url, headers=self._get_headers())
+            req = urllib.request.Request(url, headers=self._hdrs)
             
-            ssl_ctx = self._get_ssl_context()
-            with urllib.request.urlopen(req, timeout=10, context=ssl_ctx) as resp:
-                return json.loads(resp.read().decode())
+            with self._opener.open(req, timeout=10) as resp:
+                return _read_json(resp)
         except Exception as e:
             logger.warning(f"Failed to get pipeline status: {e}")
             return {"status": "unknown"}
     
     def wait_for_pipeline_loaded(self, timeout: int = 120) -> bool:
         """Wait for pipeline to be loaded"""
-        import time
         start = time.time()
         while time.time() - start < timeout:
             status = self.get_pipeline_status()
@@ -326,6 +435,26 @@ class ScopeClient:
         """Disconnect from Scope"""
         self.connected = False
         self.session_id = None
+        if self._owns_cache:
+            self._cache.clear()
+
+
+def _probe_scope_url(client: ScopeClient, url: str) -> tuple:
+    """Check basic connectivity to a Scope URL, returns (reachable, error)"""
+    # Test basic connectivity with proper headers (RunPod needs Referer)
+    try:
+        req = urllib.request.Request(url, headers=client._hdrs, method="GET")
+        with client._opener.open(req, timeout=15) as resp:
+            return resp.status == 200, None
+    except urllib.error.HTTPError as e:
+        # HTTP errors mean we reached the server
+        if e.code in [200, 404, 500]:
+            return True, None
+        return False, f"HTTP {e.code}: {e.reason}"
+    except urllib.error.URLError as e:
+        return False, f"Cannot reach URL: {e.reason}"
+    except Exception as e:
+        return False, f"Connection error: {str(e)}"
 
 
 def test_scope_connection(url: str) -> Dict[str, Any]:
@@ -345,42 +474,27 @@ def test_scope_connection(url: str) -> Dict[str, Any]:
         "error": None
     }
     
+    # A successful ICE servers GET already proves Scope is reachable, so only
+    # probe the base URL when it fails. Pipelines are fetched alongside it.
     try:
-        # First, try to reach the URL at all
-        ssl_ctx = client._get_ssl_context()
-        headers = client._get_headers()
-        
-        # Test basic connectivity with proper headers (RunPod needs Referer)
-        try:
-            req = urllib.request.Request(url, headers=headers, method="GET")
-            with urllib.request.urlopen(req, timeout=15, context=ssl_ctx) as resp:
-                if resp.status == 200:
-                    result["reachable"] = True
-        except urllib.error.HTTPError as e:
-            # HTTP errors mean we reached the server
-            if e.code in [200, 404, 500]:
-                result["reachable"] = True
-            else:
-                result["error"] = f"HTTP {e.code}: {e.reason}"
-                return result
-        except urllib.error.URLError as e:
-            result["error"] = f"Cannot reach URL: {e.reason}"
-            return result
-        except Exception as e:
-            result["error"] = f"Connection error: {str(e)}"
-            return result
-        
-        # If reachable, try to get more info
-        if result["reachable"]:
-            try:
-                result["pipelines"] = client.get_pipelines()
-            except Exception as e:
-                logger.warning(f"Could not get pipelines: {e}")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pipelines = executor.submit(client.get_pipelines)
             
             try:
-                result["ice_servers"] = client.get_ice_servers()
+                result["ice_servers"] = client._fetch_ice_servers()
+                result["reachable"] = True
             except Exception as e:
                 logger.warning(f"Could not get ICE servers: {e}")
+                result["reachable"], result["error"] = _probe_scope_url(client, url)
+                if result["reachable"]:
+                    result["ice_servers"] = copy.deepcopy(DEFAULT_ICE_SERVERS)
+            
+            # If reachable, collect the extra info
+            if result["reachable"]:
+                try:
+                    result["pipelines"] = pipelines.result()
+                except Exception as e:
+                    logger.warning(f"Could not get pipelines: {e}")
     except Exception as e:
         result["error"] = str(e)
     
@@ -0,0 +1,257 @@
+"""
+HTTP API: response framing, status revalidation, the /events stream, SDP
+exchange long-polls and their limits
+"""
+
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import web_server
+from daydream_api import DaydreamAPI
+
+
+class ServerTestCase(unittest.TestCase):
+    """Runs a DaydreamServer on a free port for each test"""
+    
+    def setUp(self):
+        port = web_server.find_free_port()
+        self.server = web_server.DaydreamServer(port, DaydreamAPI(), port)
+        self.port = port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+    
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None,
+                conn: http.client.HTTPConnection = None) -> http.client.HTTPResponse:
+        """Send one request (on conn if given, to keep the connection alive) and read the response"""
+        if conn is None:
+            conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+            self.addCleanup(conn.close)
+        conn.request(method, path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        resp.body = resp.read()
+        return resp
+
+
+class PreflightTest(ServerTestCase):
+
+    def test_preflight_is_bodiless_204(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        self.addCleanup(conn.close)
+        resp = self.request('OPTIONS', '/whip', conn=conn)
+        self.assertEqual(resp.status, 204)
+        self.assertIsNone(resp.getheader('Content-Length'))
+        self.assertIsNone(resp.getheader('Content-Type'))
+        self.assertEqual(resp.getheader('Access-Control-Max-Age'), '600')
+        
+        # The connection stays usable for the request the preflight was for
+        self.assertEqual(self.request('GET', '/api/status', conn=conn).status, 200)
+
+
+
+class RevalidationTest(ServerTestCase):
+
+    def test_unchanged_status_is_bodiless_304(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        self.addCleanup(conn.close)
+        for path in ('/status', '/api/status'):
+            first = self.request('GET', path, conn=conn)
+            etag = first.getheader('ETag')
+            self.assertEqual(first.status, 200)
+            self.assertEqual(first.getheader('Cache-Control'), 'no-cache')
+            
+            resp = self.request('GET', path, headers={'If-None-Match': etag}, conn=conn)
+            self.assertEqual(resp.status, 304)
+            self.assertEqual(resp.body, b'')
+            self.assertEqual(resp.getheader('ETag'), etag)
+            self.assertIsNone(resp.getheader('Content-Type'))
+            self.assertIsNone(resp.getheader('Content-Length'))
+    
+    def test_etag_changes_with_state(self):
+        etag = self.request('GET', '/status').getheader('ETag')
+        self.server.set_scope_info('http://127.0.0.1:1')
+        
+        resp = self.request('GET', '/status', headers={'If-None-Match': etag})
+        self.assertEqual(resp.status, 200)
+        self.assertNotEqual(resp.getheader('ETag'), etag)
+        self.assertIn(b'"scope"', resp.body)
+        
+        # The old ETag stays stale after going back: the revision only moves forward
+        self.server.clear_stream_info()
+        resp = self.request('GET', '/status', headers={'If-None-Match': etag})
+        self.assertEqual(resp.status, 200)
+        self.assertNotEqual(resp.getheader('ETag'), etag)
+    
+    def test_etags_differ_between_servers(self):
+        other = web_server.DaydreamServer(web_server.find_free_port(), DaydreamAPI(), self.port)
+        self.addCleanup(other.server_close)
+        self.assertNotEqual(self.server._next_etag(), other._next_etag())
+
+
+
+class EventStreamTest(ServerTestCase):
+
+    def _open_events(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        self.addCleanup(conn.close)
+        conn.request('GET', '/events')
+        resp = conn.getresponse()
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.getheader('Content-Type'), 'text/event-stream')
+        return resp
+    
+    @staticmethod
+    def _next_message(resp) -> list:
+        """Lines of the next SSE message (up to its blank line)"""
+        lines = []
+        while True:
+            line = resp.fp.readline().decode().rstrip('\n')
+            if not line and lines:
+                return lines
+            if line:
+                lines.append(line)
+    
+    def test_pushes_current_state_then_changes(self):
+        resp = self._open_events()
+        event, data = self._next_message(resp)
+        self.assertEqual(event, 'event: state')
+        self.assertEqual(json.loads(data[len('data: '):])['state'], 'IDLE')
+        
+        self.server.set_scope_info('http://127.0.0.1:1')
+        event, data = self._next_message(resp)
+        self.assertEqual(event, 'event: state')
+        status = json.loads(data[len('data: '):])
+        self.assertEqual((status['state'], status['backend_mode']), ('STREAMING', 'scope'))
+    
+    def test_keepalive_when_idle(self):
+        with mock.patch.object(web_server, 'SSE_KEEPALIVE', 0.2):
+            resp = self._open_events()
+            self._next_message(resp)
+            self.assertEqual(self._next_message(resp), [': keepalive'])
+
+
+class LongPollTest(ServerTestCase):
+
+    # (requests attribute, result path prefix, whether the answer is JSON)
+    EXCHANGES = (
+        ('whip_requests', '/whip/result/', False),
+        ('whep_requests', '/whep/result/', False),
+        ('scope_requests', '/scope/result/', True),
+    )
+    
+    def _add_exchange(self, attr: str, request_id: str) -> dict:
+        req_data = getattr(self.server, attr)[request_id] = {
+            'status': 'pending',
+            'answer': None,
+            'session_id': None,
+            'error': None,
+            'event': threading.Event(),
+            'created': time.monotonic()
+        }
+        return req_data
+    
+    @staticmethod
+    def _finish(req_data: dict, answer: str = None, error: str = None):
+        req_data['answer'], req_data['session_id'], req_data['error'] = answer, 's1', error
+        req_data['status'] = 'ready' if answer else 'error'
+        req_data['event'].set()
+    
+    def test_returns_as_soon_as_exchange_finishes(self):
+        for attr, path, is_json in self.EXCHANGES:
+            with self.subTest(path=path):
+                req_data = self._add_exchange(attr, 'abc')
+                threading.Timer(0.2, self._finish, (req_data, 'v=0')).start()
+                
+                started = time.monotonic()
+                resp = self.request('GET', path + 'abc')
+                self.assertLess(time.monotonic() - started, 2)
+                self.assertEqual(resp.status, 200)
+                if is_json:
+                    self.assertEqual(json.loads(resp.body), {'sdp': 'v=0', 'sessionId': 's1'})
+                else:
+                    self.assertEqual(resp.body, b'v=0')
+                self.assertNotIn('abc', getattr(self.server, attr))
+    
+    def test_pending_exchange_answers_202_at_timeout(self):
+        with mock.patch.object(web_server, 'LONG_POLL_TIMEOUT', 0.3):
+            for attr, path, _ in self.EXCHANGES:
+                with self.subTest(path=path):
+                    self._add_exchange(attr, 'abc')
+                    started = time.monotonic()
+                    resp = self.request('GET', path + 'abc')
+                    self.assertGreaterEqual(time.monotonic() - started, 0.3)
+                    self.assertEqual(resp.status, 202)
+                    self.assertEqual(json.loads(resp.body), {'status': 'pending'})
+                    # Still there for the client's next poll
+                    self.assertIn('abc', getattr(self.server, attr))
+    
+    def test_failed_exchange_answers_500(self):
+        for attr, path, _ in self.EXCHANGES:
+            with self.subTest(path=path):
+                self._finish(self._add_exchange(attr, 'abc'), error='offer rejected')
+                resp = self.request('GET', path + 'abc')
+                self.assertEqual(resp.status, 500)
+                self.assertIn(b'offer rejected', resp.body)
+                self.assertNotIn('abc', getattr(self.server, attr))
+    
+    def test_unknown_id_answers_404(self):
+        for _, path, _ in self.EXCHANGES:
+            with self.subTest(path=path):
+                self.assertEqual(self.request('GET', path + 'missing').status, 404)
+
+
+class RequestReaperTest(ServerTestCase):
+
+    def setUp(self):
+        # The reaper reads REQUEST_TTL between sweeps, so patch it before it starts
+        patcher = mock.patch.object(web_server, 'REQUEST_TTL', 0.2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+    
+    def test_drops_only_expired_results(self):
+        now = time.monotonic()
+        for requests in (self.server.whip_requests, self.server.whep_requests, self.server.scope_requests):
+            requests['old1'] = {'created': now - 10}
+            requests['old2'] = {'created': now - 5}
+            requests['live'] = {'created': now + 60}
+        
+        deadline = time.monotonic() + 2
+        while 'old2' in self.server.scope_requests and time.monotonic() < deadline:
+            time.sleep(0.05)
+        for requests in (self.server.whip_requests, self.server.whep_requests, self.server.scope_requests):
+            self.assertEqual(list(requests), ['live'])
+
+
+class BodyLimitTest(ServerTestCase):
+
+    def test_oversized_body_is_refused_unread(self):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        self.addCleanup(sock.close)
+        # Headers only: the server must answer without waiting for the body
+        sock.sendall(b"POST /whip HTTP/1.1\r\nHost: x\r\nContent-Type: application/sdp\r\n"
+                     b"Content-Length: %d\r\n\r\n" % (web_server.MAX_BODY + 1))
+        resp = http.client.HTTPResponse(sock)
+        resp.begin()
+        self.assertEqual(resp.status, 413)
+        self.assertEqual(resp.getheader('Connection'), 'close')
+        resp.read()
+        self.assertEqual(sock.recv(1), b'')  # Closed, not left waiting for the body
+        self.assertEqual(self.server.whip_requests, {})
+    
+    def test_body_at_limit_is_accepted(self):
+        resp = self.request('POST', '/scope/ice-candidate', body=b' ' * web_server.MAX_BODY)
+        self.assertNotEqual(resp.status, 413)
+
+
+if __name__ == '__main__':
+    unittest.main()
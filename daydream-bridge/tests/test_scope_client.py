@@ -0,0 +1,46 @@
+"""
+ScopeClient: per-session state of session() copies
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scope_client import ScopeClient
+
+
+class SessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = ScopeClient('http://127.0.0.1:1/')
+        self.client._cache['_fetch_ice_servers'] = ([{'urls': ['turn:x']}], float('inf'))
+    
+    def test_session_shares_opener_and_cache(self):
+        session = self.client.session()
+        self.assertIs(session._opener, self.client._opener)
+        self.assertIs(session._cache, self.client._cache)
+        self.assertEqual(session.get_ice_servers(), [{'urls': ['turn:x']}])
+    
+    def test_session_parameters_stay_local(self):
+        session = self.client.session()
+        session.update_parameters({'prompts': 'sketch', 'guidance_scale': 2.0})
+        self.assertEqual(session.config.as_offer_params({})['prompts'], [{'text': 'sketch', 'weight': 1.0}])
+        self.assertEqual(self.client.config.guidance_scale, 1.0)
+        self.assertNotEqual(self.client.config.as_offer_params({})['prompts'],
+                            session.config.as_offer_params({})['prompts'])
+    
+    def test_session_disconnect_keeps_shared_cache(self):
+        session = self.client.session()
+        session.session_id, session.connected = 's1', True
+        session.disconnect()
+        self.assertIsNone(session.session_id)
+        self.assertIn('_fetch_ice_servers', self.client._cache)
+        
+        self.client.disconnect()
+        self.assertEqual(self.client._cache, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+DaydreamServer lifecycle: binding, ports and teardown
+"""
+
+import os
+import sys
+import threading
+import unittest
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import web_server
+from daydream_api import DaydreamAPI
+
+
+class ServerBindTest(unittest.TestCase):
+
+    def test_port_in_use_raises_oserror(self):
+        port = web_server.find_free_port()
+        server = web_server.DaydreamServer(port, DaydreamAPI(), port)
+        self.addCleanup(server.server_close)
+        
+        # Not AttributeError from a half-built server: __main__ retries on OSError
+        with self.assertRaises(OSError):
+            web_server.DaydreamServer(port, DaydreamAPI(), port)
+        
+        # The server holding the port is unaffected
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/status', timeout=5) as resp:
+            self.assertEqual(resp.status, 200)
+    
+    def test_server_close_releases_writer_resources(self):
+        port = web_server.find_free_port()
+        server = web_server.DaydreamServer(port, DaydreamAPI(), port)
+        server.server_close()
+        
+        self.assertFalse(server._ws_writer.is_alive())
+        self.assertEqual(server._wake_r.fileno(), -1)
+        self.assertEqual(server._wake_w.fileno(), -1)
+        # Safe to call again (shutdown paths may close twice)
+        server.server_close()
+    
+    def test_find_free_ports_are_distinct(self):
+        ports = web_server.find_free_ports(3)
+        self.assertEqual(len(set(ports)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+WebSocket fan-out: a client that stops reading must not hold up the others,
+and a client sending oversized frames is refused
+"""
+
+import base64
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import web_server
+from daydream_api import DaydreamAPI
+
+
+FRAME_SIZE = 150_000
+FRAME_COUNT = 100
+
+
+def _send_without_sendmsg(sock, buffers):
+    """The no-sendmsg (Windows) path of web_server._send_nowait"""
+    return sock.send(buffers[0])
+
+
+class WSWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        port = web_server.find_free_port()
+        self.server = web_server.DaydreamServer(port, DaydreamAPI(), port)
+        self.port = port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.sockets = []
+    
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def _connect(self, rcvbuf: int = 0) -> tuple:
+        """Open a WebSocket to the server, returns (socket, bytes read past the handshake)"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        sock.connect(('127.0.0.1', self.port))
+        self.sockets.append(sock)
+        key = base64.b64encode(os.urandom(16))
+        sock.sendall(
+            b"GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+            b"Connection: Upgrade\r\nSec-WebSocket-Key: " + key
+            + b"\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        )
+        buf = b''
+        while b'\r\n\r\n' not in buf:
+            buf += sock.recv(4096)
+        head, rest = buf.split(b'\r\n\r\n', 1)
+        self.assertIn(b' 101 ', head)
+        return sock, rest
+    
+    @staticmethod
+    def _read_frames(sock, buf, received: list):
+        """Append the payload of every frame read to received until the socket closes"""
+        def need(n):
+            nonlocal buf
+            while len(buf) < n:
+                chunk = sock.recv(1 << 20)
+                if not chunk:
+                    raise EOFError
+                buf += chunk
+        
+        try:
+            while True:
+                need(2)
+                length = buf[1] & 0x7F
+                offset = 2
+                if length == 126:
+                    need(4)
+                    length = struct.unpack_from('!H', buf, 2)[0]
+                    offset = 4
+                elif length == 127:
+                    need(10)
+                    length = struct.unpack_from('!Q', buf, 2)[0]
+                    offset = 10
+                need(offset + length)
+                received.append(buf[offset:offset + length])
+                buf = buf[offset + length:]
+        except (OSError, EOFError):
+            pass
+    
+    def _check_fast_client_keeps_up(self):
+        slow, _ = self._connect(rcvbuf=4096)  # Never read
+        fast, rest = self._connect()
+        received = []
+        threading.Thread(target=self._read_frames, args=(fast, rest, received), daemon=True).start()
+        
+        deadline = time.monotonic() + 2
+        while len(self.server.ws_clients) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.server.ws_clients), 2)
+        
+        started = time.monotonic()
+        for i in range(FRAME_COUNT):
+            self.server.broadcast_frame(struct.pack('!I', i) + bytes(FRAME_SIZE))
+            time.sleep(0.002)
+        
+        # The fast client gets the final frame promptly even though the slow
+        # one stopped reading after the first few
+        deadline = time.monotonic() + 2
+        while not (received and received[-1][:4] == struct.pack('!I', FRAME_COUNT - 1)):
+            self.assertLess(time.monotonic(), deadline, "fast client stalled behind the slow one")
+            time.sleep(0.01)
+        self.assertLess(time.monotonic() - started, 3)
+        
+        # Frames arrive whole and in order; the slow client only ever holds the latest
+        indexes = [struct.unpack_from('!I', p)[0] for p in received]
+        self.assertEqual(indexes, sorted(indexes))
+        self.assertTrue(all(len(p) == FRAME_SIZE + 4 for p in received))
+        for client in self.server.ws_clients:
+            self.assertLessEqual(len(client.frames), web_server.WS_QUEUE_FRAMES)
+    
+    def test_slow_client_does_not_stall_fast_client(self):
+        self._check_fast_client_keeps_up()
+    
+    def test_slow_client_does_not_stall_fast_client_without_sendmsg(self):
+        with mock.patch.object(web_server, '_send_nowait', _send_without_sendmsg):
+            self._check_fast_client_keeps_up()
+    
+    def test_client_sockets_are_non_blocking(self):
+        self._connect()
+        deadline = time.monotonic() + 2
+        while not self.server.ws_clients and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for client in self.server.ws_clients:
+            self.assertFalse(client.sock.getblocking())
+    
+    def test_oversized_frame_is_refused_with_1009(self):
+        sock, rest = self._connect()
+        # Masked binary frame declaring more than MAX_BODY, then its first 128 KB
+        sock.sendall(struct.pack('!BBQ', 0x82, 0x80 | 127, web_server.MAX_BODY + 1)
+                     + os.urandom(4) + bytes(128 * 1024))
+        
+        sock.settimeout(5)
+        buf = rest
+        while len(buf) < 4:
+            chunk = sock.recv(4096)
+            self.assertTrue(chunk, "connection closed without a Close frame")
+            buf += chunk
+        self.assertEqual(buf[:4], bytes((0x88, 2)) + struct.pack('!H', 1009))
+        
+        # The server hangs up once we do, without waiting for the rest of the frame
+        sock.shutdown(socket.SHUT_WR)
+        while sock.recv(4096):
+            pass
+        deadline = time.monotonic() + 2
+        while self.server.ws_clients and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(self.server.ws_clients)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,19 +8,119 @@ Handles:
 
 import http.server
 import socketserver
+import selectors
 import threading
 import json
-import secrets
+import itertools
+import logging
+import os
+import queue
 import socket
-from typing import Optional, Callable, Dict, Set
-from urllib.parse import urlparse, parse_qs
+from collections import deque
+from typing import Optional, Callable, Dict, FrozenSet
 import struct
 import hashlib
 import base64
+import gzip
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    # SIMD masking compiled into the websockets package, when it's installed
+    from websockets.speedups import apply_mask as _simd_apply_mask
+except ImportError:
+    _simd_apply_mask = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from daydream_api import DaydreamAPI, StreamConfig
 from control_panel import CONTROL_PANEL_HTML
 
+logger = logging.getLogger(__name__)
+
+
+if orjson is not None:
+    # orjson produces and consumes bytes directly
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    
+    def _loads(data: bytes):
+        return json.loads(data)
+
+
+# Static JSON bodies, serialized once
+_DEFAULT_ICE_JSON = _dumps({'iceServers': [{"urls": ["stun:stun.l.google.com:19302"]}]})
+_EMPTY_SOURCES_JSON = _dumps({'sources': []})
+_PENDING_JSON = _dumps({'status': 'pending'})
+
+
+def _html_responses(html: bytes, html_gz: bytes) -> tuple:
+    """Build complete 200 responses (status line, headers, body) for a static page, plain and gzipped"""
+    head = b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+    return (
+        head + b"Content-Length: %d\r\n\r\n" % len(html) + html,
+        head + b"Content-Encoding: gzip\r\nVary: Accept-Encoding\r\n"
+        + b"Content-Length: %d\r\n\r\n" % len(html_gz) + html_gz,
+    )
+
+
+# The control panel page never changes at runtime, so encode it once
+_CONTROL_PANEL_BYTES = CONTROL_PANEL_HTML.encode('utf-8')
+_CONTROL_PANEL_GZ = gzip.compress(_CONTROL_PANEL_BYTES, 9)
+_CONTROL_PANEL_RESPONSES = _html_responses(_CONTROL_PANEL_BYTES, _CONTROL_PANEL_GZ)
+
+# StreamConfig fields a stream start/update request may set
+_STREAM_FIELDS = ('prompt', 'negative_prompt', 'model_id', 'delta',
+                  'depth_scale', 'canny_scale', 'tile_scale')
+
+# Request IDs only correlate a proxy request with its result poll inside this
+# process, so a counter XOR'd with a random per-process seed is enough
+_ID_SEED = int.from_bytes(os.urandom(6), 'big')
+_ID_COUNTER = itertools.count()
+
+
+def _gen_request_id() -> str:
+    """Short, unique, URL-safe ID for a pending SDP exchange"""
+    n = (next(_ID_COUNTER) ^ _ID_SEED) & 0xFFFFFFFFFFFF
+    return base64.urlsafe_b64encode(n.to_bytes(6, 'big')).decode()
+
+
+# How long a /*/result/<id> request waits for the exchange before answering 202
+LONG_POLL_TIMEOUT = 25
+
+# Seconds between keepalive comments on an idle /events stream
+SSE_KEEPALIVE = 15
+
+# Pending SDP exchanges nobody collected (e.g. tab closed mid-poll) are dropped
+# after REQUEST_TTL seconds; new offers get 429 past MAX_PENDING_REQUESTS
+REQUEST_TTL = 60
+MAX_PENDING_REQUESTS = 1024
+
+# Video frames queued per WebSocket client behind the one being sent; older ones
+# are dropped, so a client that falls behind skips straight to the latest frame
+WS_QUEUE_FRAMES = 1
+
+# Largest POST body accepted (SDP offers and JSON configs are a few KB), also
+# the largest incoming WebSocket frame; bigger ones are refused with close 1009
+MAX_BODY = 1 << 20
+
+# Seconds to wait for a WebSocket peer to hang up after we send a Close frame
+WS_CLOSE_TIMEOUT = 2
+
+# Connection threads kept parked for reuse once their connection closes
+IDLE_CONN_WORKERS = 16
+
 
 def find_free_port() -> int:
     """Find an available port"""
@@ -29,10 +129,90 @@ def find_free_port() -> int:
         return s.getsockname()[1]
 
 
+def find_free_ports(count: int) -> list:
+    """Find count distinct available ports (all held open together while picking)"""
+    socks = [socket.socket(socket.AF_INET, socket.SOCK_STREAM) for _ in range(count)]
+    try:
+        for s in socks:
+            s.bind(('127.0.0.1', 0))
+        return [s.getsockname()[1] for s in socks]
+    finally:
+        for s in socks:
+            s.close()
+
+
+def _send_nowait(sock: socket.socket, buffers: list) -> int:
+    """Send as much of buffers as the non-blocking socket takes right now, returns bytes sent"""
+    if hasattr(sock, 'sendmsg'):
+        # Header and payload go to the kernel as separate iovecs (writev)
+        return sock.sendmsg(buffers)
+    # No sendmsg (Windows): one buffer per call
+    return sock.send(buffers[0])
+
+
+# XOR translate tables, one per key byte value, built on first use
+_XOR_TABLES: Dict[int, bytes] = {}
+
+# Above this size the per-lane translate beats the big-integer XOR
+TRANSLATE_MASK_MIN = 4096
+
+
+def _xor_table(key_byte: int) -> bytes:
+    table = _XOR_TABLES.get(key_byte)
+    if table is None:
+        table = _XOR_TABLES[key_byte] = bytes(i ^ key_byte for i in range(256))
+    return table
+
+
+def _apply_mask_translate(payload: bytes, mask: bytes) -> bytes:
+    """Pure-Python masking: translate each of the 4 byte lanes with its key byte's table"""
+    payload = bytes(payload)
+    out = bytearray(len(payload))
+    for lane in range(4):
+        out[lane::4] = payload[lane::4].translate(_xor_table(mask[lane]))
+    return bytes(out)
+
+
+def _apply_mask_swar(payload: bytes, mask: bytes) -> bytes:
+    """Pure-Python masking: XOR the payload as one big integer, word by word in C"""
+    length = len(payload)
+    key = (bytes(mask) * (length // 4 + 1))[:length]
+    word = int.from_bytes(payload, 'little') ^ int.from_bytes(key, 'little')
+    return word.to_bytes(length, 'little')
+
+
+def _apply_mask(payload: bytes, mask: bytes) -> bytes:
+    """XOR a WebSocket payload with its 4-byte masking key"""
+    if _simd_apply_mask is not None:
+        return _simd_apply_mask(payload, mask)
+    
+    if np is None:
+        if len(payload) >= TRANSLATE_MASK_MIN:
+            return _apply_mask_translate(payload, mask)
+        return _apply_mask_swar(payload, mask)
+    
+    # XOR whole 64-bit words against the key (repeated to 8 bytes) as one
+    # scalar, then the byte tail
+    out = np.frombuffer(payload, dtype=np.uint8).copy()
+    key = np.frombuffer(bytes(mask) * 2, dtype=np.uint8)
+    words = len(out) & ~7
+    out[:words].view(np.uint64)[...] ^= key.view(np.uint64)[0]
+    out[words:] ^= key[:len(out) - words]
+    return out.tobytes()
+
+
 class WebSocketHandler:
     """Simple WebSocket handler for frame streaming"""
     
     GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+    GUID_BYTES = GUID.encode('ascii')
+    RESPONSE_TMPL = (
+        b"HTTP/1.1 101 Switching Protocols\r\n"
+        b"Upgrade: websocket\r\n"
+        b"Connection: Upgrade\r\n"
+        b"Sec-WebSocket-Accept: %b\r\n"
+        b"\r\n"
+    )
     
     def __init__(self, request, client_address, server):
         self.request = request
@@ -49,72 +229,123 @@ class WebSocketHandler:
     
     def do_handshake(self, headers: Dict[str, str]) -> bytes:
         """Perform WebSocket handshake"""
-        key = headers.get('Sec-WebSocket-Key', '')
-        accept = base64.b64encode(
-            hashlib.sha1((key + self.GUID).encode()).digest()
-        ).decode()
-        
-        response = (
-            "HTTP/1.1 101 Switching Protocols\r\n"
-            "Upgrade: websocket\r\n"
-            "Connection: Upgrade\r\n"
-            f"Sec-WebSocket-Accept: {accept}\r\n"
-            "\r\n"
-        )
+        key = headers.get('Sec-WebSocket-Key', '').encode('latin-1')
+        accept = base64.b64encode(hashlib.sha1(key + self.GUID_BYTES).digest())
         self.handshake_done = True
-        return response.encode()
+        return self.RESPONSE_TMPL % accept
+    
+    # Prebuilt 2-byte FIN headers for short binary/text payloads (0-125 bytes)
+    _SMALL_HEADERS = {
+        0x02: [bytes((0x82, n)) for n in range(126)],
+        0x01: [bytes((0x81, n)) for n in range(126)],
+    }
+    
+    # Precompiled packers for the 16- and 64-bit extended length headers
+    _HEADER_16 = struct.Struct('!BBH')
+    _HEADER_64 = struct.Struct('!BBQ')
     
     @staticmethod
-    def encode_frame(data: bytes, opcode: int = 0x02) -> bytes:
-        """Encode a WebSocket frame (binary by default)"""
-        length = len(data)
-        
+    def encode_header(length: int, opcode: int = 0x02) -> bytes:
+        """Encode a WebSocket frame header for a payload of the given length"""
         if length <= 125:
-            header = struct.pack('BB', 0x80 | opcode, length)
+            table = WebSocketHandler._SMALL_HEADERS.get(opcode)
+            if table is not None:
+                return table[length]
+            return struct.pack('BB', 0x80 | opcode, length)
         elif length <= 65535:
-            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+            return WebSocketHandler._HEADER_16.pack(0x80 | opcode, 126, length)
         else:
-            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
-        
-        return header + data
+            return WebSocketHandler._HEADER_64.pack(0x80 | opcode, 127, length)
     
     @staticmethod
-    def decode_frame(data: bytes) -> tuple:
-        """Decode a WebSocket frame, returns (opcode, payload, consumed)"""
-        if len(data) < 2:
-            return None, None, 0
-        
-        opcode = data[0] & 0x0F
-        masked = bool(data[1] & 0x80)
-        length = data[1] & 0x7F
-        
-        offset = 2
+    def encode_frame(data: bytes, opcode: int = 0x02) -> bytes:
+        """Encode a complete WebSocket frame (binary by default)"""
+        return WebSocketHandler.encode_header(len(data), opcode) + data
+    
+    @staticmethod
+    def frame_size(data: bytes, start: int = 0) -> int:
+        """Size (header + payload) declared by the frame at data[start:], 0 until its header is in"""
+        available = len(data) - start
+        if available < 2:
+            return 0
+        
+        size = 2 + (4 if data[start + 1] & 0x80 else 0)
+        length = data[start + 1] & 0x7F
+        if length == 126:
+            if available < 4:
+                return 0
+            return size + 2 + struct.unpack_from('!H', data, start + 2)[0]
+        elif length == 127:
+            if available < 10:
+                return 0
+            return size + 8 + struct.unpack_from('!Q', data, start + 2)[0]
+        return size + length
+    
+    @staticmethod
+    def decode_frame(data: bytes, control_only: bool = False, start: int = 0) -> tuple:
+        """
+        Decode the WebSocket frame at data[start:], returns (opcode, payload, end).
+        
+        end is the offset just past the frame (the bytes consumed when start
+        is 0); opcode is None while the frame is incomplete. With control_only,
+        text/binary payloads are skipped (returned as b'') instead of being
+        copied and unmasked.
+        """
+        available = len(data)
+        if available < start + 2:
+            return None, None, start
+        
+        opcode = data[start] & 0x0F
+        masked = bool(data[start + 1] & 0x80)
+        length = data[start + 1] & 0x7F
+        
+        offset = start + 2
         if length == 126:
-            if len(data) < 4:
-                return None, None, 0
-            length = struct.unpack('!H', data[2:4])[0]
-            offset = 4
+            if available < offset + 2:
+                return None, None, start
+            length = struct.unpack_from('!H', data, offset)[0]
+            offset += 2
         elif length == 127:
-            if len(data) < 10:
-                return None, None, 0
-            length = struct.unpack('!Q', data[2:10])[0]
-            offset = 10
+            if available < offset + 8:
+                return None, None, start
+            length = struct.unpack_from('!Q', data, offset)[0]
+            offset += 8
         
         if masked:
-            if len(data) < offset + 4:
-                return None, None, 0
-            mask = data[offset:offset+4]
+            if available < offset + 4:
+                return None, None, start
+            mask = bytes(data[offset:offset+4])
             offset += 4
         
-        if len(data) < offset + length:
-            return None, None, 0
+        end = offset + length
+        if available < end:
+            return None, None, start
         
-        payload = data[offset:offset+length]
+        if control_only and opcode < 0x08:
+            return opcode, b'', end
         
-        if masked:
-            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        payload = bytes(data[offset:end])
         
-        return opcode, payload, offset + length
+        # An all-zero key leaves the payload unchanged: skip the XOR
+        if masked and mask != b'\0\0\0\0':
+            payload = _apply_mask(payload, mask)
+        
+        return opcode, payload, end
+
+
+class _WSClient:
+    """Outgoing queue of one WebSocket client, drained by the server's writer thread"""
+    
+    __slots__ = ('sock', 'frames', 'control', 'out', 'waiting', 'closing', 'closed')
+    
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.frames = deque(maxlen=WS_QUEUE_FRAMES)  # (header, payload) views; oldest dropped
+        self.control = deque()  # Control frames (pong), never dropped
+        self.out = []  # Unsent memoryviews of the frame being written
+        self.waiting = False  # Registered with the selector for EVENT_WRITE
+        self.closing = False  # Close frame queued: send no more video
+        self.closed = False
 
 
 class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
@@ -122,153 +353,237 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
     
     protocol_version = 'HTTP/1.1'
     
+    # StreamRequestHandler.setup() sets TCP_NODELAY on the accepted socket
+    disable_nagle_algorithm = True
+    
+    # Room for a whole JPEG frame so WebSocket sends rarely block
+    SEND_BUFFER_SIZE = 256 * 1024
+    
+    def setup(self):
+        super().setup()
+        try:
+            self.request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.SEND_BUFFER_SIZE)
+        except OSError:
+            pass
+    
     def log_message(self, format, *args):
         # Quieter logging
         pass
     
-    def _send_cors_headers(self):
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+    _CORS_HEADERS = (
+        b"Access-Control-Allow-Origin: *\r\n"
+        b"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+        b"Access-Control-Allow-Headers: Content-Type\r\n"
+    )
+    
+    # Encoded status line + Content-Type (+ CORS) per (status, content_type, cors)
+    _HEADER_PREFIXES: Dict[tuple, bytes] = {}
+    
+    def _header_prefix(self, status: int, content_type: Optional[str], cors: bool) -> bytes:
+        """Status line and fixed headers (no Content-Type when content_type is None)"""
+        key = (status, content_type, cors)
+        prefix = self._HEADER_PREFIXES.get(key)
+        if prefix is None:
+            prefix = b"%s %d %s\r\n" % (
+                self.protocol_version.encode(), status, self.responses[status][0].encode()
+            )
+            if content_type is not None:
+                prefix += b"Content-Type: %s\r\n" % content_type.encode()
+            if cors:
+                prefix += self._CORS_HEADERS
+            self._HEADER_PREFIXES[key] = prefix
+        return prefix
+    
+    def _send_bytes(self, body: bytes, content_type: str = 'application/json',
+                    status: int = 200, cors: bool = True, extra_headers: bytes = b''):
+        """Send status line, headers and body with a single socket write"""
+        self.wfile.write(
+            self._header_prefix(status, content_type, cors)
+            + b"Content-Length: %d\r\n" % len(body)
+            + extra_headers + b"\r\n" + body
+        )
+    
+    def _send_revalidated(self, body: bytes, etag: str):
+        """Send a JSON body with its ETag, or 304 if the client's copy is current"""
+        # no-cache makes browsers revalidate every poll (sending If-None-Match
+        # themselves) instead of reusing a stale status
+        extra = b"Cache-Control: no-cache\r\nETag: %s\r\n" % etag.encode()
+        if self.headers.get('If-None-Match') == etag:
+            # A 304 has no body: just the validator and cache headers, which
+            # the browser merges into the copy it already has
+            self.wfile.write(self._header_prefix(304, None, False) + extra + b"\r\n")
+        else:
+            self._send_bytes(body, extra_headers=extra)
+    
+    def send_error(self, code, message=None, explain=None):
+        """Send an error as one plain-text response and close the connection"""
+        # The request body may not have been read (e.g. 413), so don't reuse it
+        self.close_connection = True
+        if code not in self.responses:
+            code = 500
+        body = (message or self.responses[code][0]).encode('utf-8', 'replace')
+        self._send_bytes(body, 'text/plain; charset=utf-8', status=code,
+                         extra_headers=b"Connection: close\r\n")
+    
+    def _send_html(self, responses: tuple):
+        """Send a prebuilt static page response, the gzipped one when the client accepts it"""
+        self.wfile.write(responses['gzip' in self.headers.get('Accept-Encoding', '')])
+    
+    def _read_body(self, length: int) -> bytearray:
+        """Read exactly length bytes of request body into one preallocated buffer"""
+        body = bytearray(length)
+        view = memoryview(body)
+        got = 0
+        while got < length:
+            n = self.rfile.readinto(view[got:])
+            if not n:
+                del body[got:]
+                break
+            got += n
+        return body
     
     def do_OPTIONS(self):
-        self.send_response(204)
-        self._send_cors_headers()
-        self.end_headers()
+        # CORS preflight (the relay page POSTs JSON across ports); let the
+        # browser cache the answer so repeat POSTs skip the extra round trip.
+        # A 204 has no body, so no Content-Type or Content-Length (RFC 9110 8.6)
+        self.wfile.write(
+            self._header_prefix(204, None, True)
+            + b"Access-Control-Max-Age: 600\r\n\r\n"
+        )
+    
+    # Routing tables: exact path -> handler name, and (prefix, handler name)
+    # for routes that take the rest of the path as an argument
+    _GET_ROUTES = {
+        '/': '_serve_control_panel',
+        '/relay': '_serve_relay_html',
+        '/relay.html': '_serve_relay_html',
+        '/status': '_serve_status',
+        '/events': '_serve_events',
+        '/api/status': '_serve_api_status',
+        '/api/sources': '_serve_ndi_sources',
+        '/scope/ice-servers': '_serve_scope_ice_servers',
+        '/ws': '_handle_websocket_upgrade',
+    }
+    _GET_PREFIX_ROUTES = (
+        ('/whip/result/', '_serve_whip_result'),
+        ('/scope/result/', '_serve_scope_result'),
+        ('/whep/result/', '_serve_whep_result'),
+    )
+    _POST_ROUTES = {
+        '/whip': '_handle_whip_proxy',
+        '/whep': '_handle_whep_proxy',
+        '/scope/offer': '_handle_scope_offer',
+        '/scope/ice-candidate': '_handle_scope_ice_candidate',
+        '/api/stream/start': '_handle_stream_start',
+        '/api/stream/update': '_handle_stream_update',
+        '/api/stream/stop': '_handle_stream_stop',
+        '/api/scope/test': '_handle_scope_test',
+        '/api/scope/pipeline/status': '_handle_scope_pipeline_status',
+        '/api/scope/pipeline/load': '_handle_scope_pipeline_load',
+    }
     
     def do_GET(self):
-        parsed = urlparse(self.path)
-        path = parsed.path
-        
-        if path == '/':
-            self._serve_control_panel()
-        elif path == '/relay' or path == '/relay.html':
-            self._serve_relay_html()
-        elif path == '/status':
-            self._serve_status()
-        elif path == '/api/status':
-            self._serve_api_status()
-        elif path == '/api/sources':
-            self._serve_ndi_sources()
-        elif path == '/scope/ice-servers':
-            self._serve_scope_ice_servers()
-        elif path.startswith('/whip/result/'):
-            self._serve_whip_result(path.split('/whip/result/')[-1])
-        elif path.startswith('/scope/result/'):
-            self._serve_scope_result(path.split('/scope/result/')[-1])
-        elif path.startswith('/whep/result/'):
-            self._serve_whep_result(path.split('/whep/result/')[-1])
-        elif path == '/ws':
-            self._handle_websocket_upgrade()
-        else:
-            self.send_error(404)
+        # No handler reads the query string, so skip urlparse
+        path = self.path.partition('?')[0]
+        
+        handler = self._GET_ROUTES.get(path)
+        if handler:
+            getattr(self, handler)()
+            return
+        
+        for prefix, handler in self._GET_PREFIX_ROUTES:
+            if path.startswith(prefix):
+                getattr(self, handler)(path[len(prefix):])
+                return
+        
+        self.send_error(404)
     
     def do_POST(self):
-        parsed = urlparse(self.path)
-        path = parsed.path
-        
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length) if content_length > 0 else b''
-        
-        if path == '/whip':
-            self._handle_whip_proxy(body)
-        elif path == '/whep':
-            self._handle_whep_proxy(body)
-        elif path == '/scope/offer':
-            self._handle_scope_offer(body)
-        elif path == '/scope/ice-candidate':
-            self._handle_scope_ice_candidate(body)
-        elif path == '/api/stream/start':
-            self._handle_stream_start(body)
-        elif path == '/api/stream/update':
-            self._handle_stream_update(body)
-        elif path == '/api/stream/stop':
-            self._handle_stream_stop()
-        elif path == '/api/scope/test':
-            self._handle_scope_test(body)
-        elif path == '/api/scope/pipeline/status':
-            self._handle_scope_pipeline_status(body)
-        elif path == '/api/scope/pipeline/load':
-            self._handle_scope_pipeline_load(body)
+        # No handler reads the query string, so skip urlparse
+        path = self.path.partition('?')[0]
+        
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            self.send_error(400, "Invalid Content-Length")
+            return
+        
+        # Reject oversized bodies before reading any of them
+        if content_length > MAX_BODY:
+            self.send_error(413, "Request body too large")
+            return
+        
+        body = self._read_body(content_length) if content_length > 0 else b''
+        
+        handler = self._POST_ROUTES.get(path)
+        if handler:
+            getattr(self, handler)(body)
         else:
             self.send_error(404)
     
     def _serve_relay_html(self):
         """Serve the WebRTC relay HTML page"""
-        html = self.server.get_relay_html()
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', len(html))
-        self.end_headers()
-        self.wfile.write(html)
+        self._send_html(self.server._relay_responses)
     
     def _serve_control_panel(self):
         """Serve the control panel HTML page"""
-        html = CONTROL_PANEL_HTML.encode('utf-8')
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', len(html))
-        self.end_headers()
-        self.wfile.write(html)
+        self._send_html(_CONTROL_PANEL_RESPONSES)
     
     def _serve_api_status(self):
         """Serve API status (JSON)"""
-        status = {
-            'connected': True,
-            'streaming': self.server.state == "STREAMING",
-            'stream_id': self.server.stream_id,
-        }
-        data = json.dumps(status).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        server = self.server
+        key = (server.state, server.stream_id)
+        cached = server._api_status_json
+        if not cached or cached[0] != key:
+            status = {
+                'connected': True,
+                'streaming': key[0] == "STREAMING",
+                'stream_id': key[1],
+            }
+            cached = server._api_status_json = (key, _dumps(status), server._next_etag())
+        self._send_revalidated(cached[1], cached[2])
     
     def _serve_ndi_sources(self):
         """Serve list of NDI sources"""
-        sources = []
-        if hasattr(self.server, 'bridge') and self.server.bridge:
-            bridge = self.server.bridge
-            if hasattr(bridge, 'ndi_sources'):
+        data = _EMPTY_SOURCES_JSON
+        bridge = getattr(self.server, 'bridge', None)
+        if bridge and getattr(bridge, 'ndi_sources', None):
+            # Re-serialize only when a rescan has replaced the list
+            rev = getattr(bridge, 'ndi_sources_rev', None)
+            cached = self.server._ndi_sources_json
+            if rev is not None and cached and cached[0] == rev:
+                data = cached[1]
+            else:
                 sources = [{'name': s['name'], 'url': s.get('url', '')} for s in bridge.ndi_sources]
+                data = _dumps({'sources': sources})
+                self.server._ndi_sources_json = (rev, data)
         
-        data = json.dumps({'sources': sources}).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        self._send_bytes(data)
     
     def _serve_scope_ice_servers(self):
         """Proxy ICE servers from Scope (includes TURN if HF_TOKEN is set on Scope)"""
-        ice_servers = [{"urls": ["stun:stun.l.google.com:19302"]}]
+        data = _DEFAULT_ICE_JSON
         
         if self.server.scope_url:
-            try:
-                from scope_client import ScopeClient
-                client = ScopeClient(self.server.scope_url)
-                scope_ice_servers = client.get_ice_servers()
-                if scope_ice_servers:
-                    ice_servers = scope_ice_servers
-                    print(f"✓ Got {len(ice_servers)} ICE servers from Scope (includes TURN)")
-            except Exception as e:
-                print(f"⚠ Could not get ICE servers from Scope: {e}")
+            # get_ice_servers() caches the list and falls back to STUN on errors
+            ice_servers = self.server._get_scope_client().get_ice_servers()
+            if ice_servers:
+                data = _dumps({'iceServers': ice_servers})
+                logger.debug("Serving %d ICE servers from Scope", len(ice_servers))
         
-        data = json.dumps({'iceServers': ice_servers}).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        self._send_bytes(data)
+    
+    @staticmethod
+    def _apply_stream_params(config: StreamConfig, params: dict):
+        """Copy the stream fields present in a request onto the config"""
+        for field in _STREAM_FIELDS:
+            if field in params:
+                setattr(config, field, params[field])
     
     def _handle_stream_start(self, body: bytes):
         """Start streaming with given config"""
         try:
-            params = json.loads(body.decode('utf-8')) if body else {}
+            params = _loads(body) if body else {}
             
             if not hasattr(self.server, 'bridge') or not self.server.bridge:
                 raise ValueError("Bridge not initialized")
@@ -280,13 +595,7 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
             scope_url = params.get('scope_url', '')
             
             # Update config
-            bridge.config.prompt = params.get('prompt', bridge.config.prompt)
-            bridge.config.negative_prompt = params.get('negative_prompt', bridge.config.negative_prompt)
-            bridge.config.model_id = params.get('model_id', bridge.config.model_id)
-            bridge.config.delta = params.get('delta', bridge.config.delta)
-            bridge.config.depth_scale = params.get('depth_scale', bridge.config.depth_scale)
-            bridge.config.canny_scale = params.get('canny_scale', bridge.config.canny_scale)
-            bridge.config.tile_scale = params.get('tile_scale', bridge.config.tile_scale)
+            self._apply_stream_params(bridge.config, params)
             
             # Select NDI source
             source_index = params.get('source_index')
@@ -317,18 +626,13 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
             traceback.print_exc()
             response = {'success': False, 'error': str(e)}
         
-        data = json.dumps(response).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        data = _dumps(response)
+        self._send_bytes(data)
     
     def _handle_stream_update(self, body: bytes):
         """Update stream parameters"""
         try:
-            params = json.loads(body.decode('utf-8')) if body else {}
+            params = _loads(body) if body else {}
             
             if not hasattr(self.server, 'bridge') or not self.server.bridge:
                 raise ValueError("Bridge not initialized")
@@ -336,13 +640,7 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
             bridge = self.server.bridge
             
             # Update config
-            bridge.config.prompt = params.get('prompt', bridge.config.prompt)
-            bridge.config.negative_prompt = params.get('negative_prompt', bridge.config.negative_prompt)
-            bridge.config.model_id = params.get('model_id', bridge.config.model_id)
-            bridge.config.delta = params.get('delta', bridge.config.delta)
-            bridge.config.depth_scale = params.get('depth_scale', bridge.config.depth_scale)
-            bridge.config.canny_scale = params.get('canny_scale', bridge.config.canny_scale)
-            bridge.config.tile_scale = params.get('tile_scale', bridge.config.tile_scale)
+            self._apply_stream_params(bridge.config, params)
             
             print(f"📝 Updating params: prompt='{bridge.config.prompt[:30]}...', delta={bridge.config.delta}")
             
@@ -360,15 +658,10 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
             print(f"✗ Update error: {e}")
             response = {'success': False, 'error': str(e)}
         
-        data = json.dumps(response).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        data = _dumps(response)
+        self._send_bytes(data)
     
-    def _handle_stream_stop(self):
+    def _handle_stream_stop(self, body: bytes = b''):
         """Stop streaming"""
         try:
             if hasattr(self.server, 'bridge') and self.server.bridge:
@@ -377,18 +670,13 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
         except Exception as e:
             response = {'success': False, 'error': str(e)}
         
-        data = json.dumps(response).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        data = _dumps(response)
+        self._send_bytes(data)
     
     def _handle_scope_test(self, body: bytes):
         """Test connection to a Scope instance"""
         try:
-            params = json.loads(body.decode('utf-8')) if body else {}
+            params = _loads(body) if body else {}
             scope_url = params.get('url', '').strip()
             
             if not scope_url:
@@ -399,97 +687,117 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
         except Exception as e:
             response = {'reachable': False, 'error': str(e)}
         
-        data = json.dumps(response).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        data = _dumps(response)
+        self._send_bytes(data)
     
     def _handle_scope_pipeline_status(self, body: bytes):
         """Get pipeline status from Scope"""
         try:
-            params = json.loads(body.decode('utf-8')) if body else {}
+            params = _loads(body) if body else {}
             scope_url = params.get('url', '').strip()
             
             if not scope_url:
                 response = {'status': 'error', 'error': 'No URL provided'}
             else:
-                from scope_client import ScopeClient
-                client = ScopeClient(scope_url)
+                client = self.server._get_scope_client(scope_url)
                 response = client.get_pipeline_status()
                 print(f"Pipeline status: {response}")  # Debug log
         except Exception as e:
             print(f"Pipeline status error: {e}")  # Debug log
             response = {'status': 'error', 'error': str(e)}
         
-        data = json.dumps(response).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        data = _dumps(response)
+        self._send_bytes(data)
     
     def _handle_scope_pipeline_load(self, body: bytes):
         """Load a pipeline on Scope"""
         try:
-            params = json.loads(body.decode('utf-8')) if body else {}
+            params = _loads(body) if body else {}
             scope_url = params.get('url', '').strip()
             pipeline_id = params.get('pipeline_id', 'streamdiffusionv2')
             
             if not scope_url:
                 response = {'success': False, 'error': 'No URL provided'}
             else:
-                from scope_client import ScopeClient
-                client = ScopeClient(scope_url)
+                client = self.server._get_scope_client(scope_url)
                 success = client.load_pipeline(pipeline_id)
                 response = {'success': success, 'pipeline_id': pipeline_id}
         except Exception as e:
             response = {'success': False, 'error': str(e)}
         
-        data = json.dumps(response).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        data = _dumps(response)
+        self._send_bytes(data)
+    
+    def _status_snapshot(self) -> tuple:
+        """Current (state fields, status JSON, ETag), re-serialized only on change"""
+        server = self.server
+        key = (server.state, server.stream_id, server.whip_url,
+               server.whep_url, server.backend_mode, server.scope_url)
+        cached = server._status_json
+        if not cached or cached[0] != key:
+            status = dict(zip(
+                ('state', 'stream_id', 'whip_url', 'whep_url', 'backend_mode', 'scope_url'),
+                key
+            ))
+            cached = server._status_json = (key, _dumps(status), server._next_etag())
+        return cached
     
     def _serve_status(self):
         """Serve current stream status"""
-        status = {
-            'state': self.server.state,
-            'stream_id': self.server.stream_id,
-            'whip_url': self.server.whip_url,
-            'whep_url': self.server.whep_url,
-            'backend_mode': self.server.backend_mode,
-            'scope_url': self.server.scope_url
-        }
-        data = json.dumps(status).encode()
-        self.send_response(200)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(data))
-        self.end_headers()
-        self.wfile.write(data)
+        _, data, etag = self._status_snapshot()
+        self._send_revalidated(data, etag)
+    
+    def _serve_events(self):
+        """Push stream status to the client as Server-Sent Events whenever it changes"""
+        server = self.server
+        self.close_connection = True
+        last_etag = None
+        try:
+            self.wfile.write(
+                self._header_prefix(200, 'text/event-stream', True)
+                + b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            )
+            while True:
+                with server._state_cond:
+                    _, data, etag = self._status_snapshot()
+                    if etag == last_etag:
+                        server._state_cond.wait(SSE_KEEPALIVE)
+                        _, data, etag = self._status_snapshot()
+                if etag != last_etag:
+                    last_etag = etag
+                    self.wfile.write(b"event: state\ndata: %s\n\n" % data)
+                else:
+                    # Comment line: keeps proxies from timing out, detects gone clients
+                    self.wfile.write(b": keepalive\n\n")
+        except OSError:
+            pass  # Client went away
+    
+    def _too_many_requests(self, requests: Dict[str, dict]) -> bool:
+        """Answer 429 if too many SDP exchanges are still waiting to be collected"""
+        if len(requests) < MAX_PENDING_REQUESTS:
+            return False
+        self._send_bytes(_dumps({'error': 'Too many pending requests'}), status=429)
+        return True
     
     def _handle_whip_proxy(self, body: bytes):
         """Proxy WHIP offer to Daydream and return answer"""
         if not self.server.whip_url:
             self.send_error(400, "No WHIP URL available")
             return
+        if self._too_many_requests(self.server.whip_requests):
+            return
         
         offer_sdp = body.decode('utf-8')
-        request_id = secrets.token_urlsafe(8)
+        request_id = _gen_request_id()
         
         # Store request for async processing
-        self.server.whip_requests[request_id] = {
+        req_data = self.server.whip_requests[request_id] = {
             'status': 'pending',
             'offer': offer_sdp,
             'answer': None,
-            'error': None
+            'error': None,
+            'event': threading.Event(),
+            'created': time.monotonic()
         }
         
         # Process in background
@@ -505,86 +813,84 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
                 for k, v in headers.items():
                     if k.lower() == 'livepeer-playback-url':
                         self.server.whep_url = v
+                        self.server.notify_state_changed()
                         print(f"✓ Got WHEP URL: {v}")
                         break
                 
-                self.server.whip_requests[request_id]['answer'] = answer_sdp
-                self.server.whip_requests[request_id]['status'] = 'ready'
+                req_data['answer'] = answer_sdp
+                req_data['status'] = 'ready'
                 
             except Exception as e:
                 print(f"WHIP proxy error: {e}")
-                self.server.whip_requests[request_id]['error'] = str(e)
-                self.server.whip_requests[request_id]['status'] = 'error'
+                req_data['error'] = str(e)
+                req_data['status'] = 'error'
+            finally:
+                req_data['event'].set()
         
-        threading.Thread(target=exchange_async, daemon=True).start()
+        self.server._exchange_pool.submit(exchange_async)
         
         # Return request ID for polling
-        response = json.dumps({'id': request_id}).encode()
-        self.send_response(202)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(response))
-        self.end_headers()
-        self.wfile.write(response)
+        response = _dumps({'id': request_id})
+        self._send_bytes(response, status=202)
     
     def _serve_whip_result(self, request_id: str):
-        """Serve WHIP result (polling)"""
-        req_data = self.server.whip_requests.get(request_id)
-        
-        if not req_data:
-            self.send_error(404, "Request not found")
+        """Serve WHIP result (long-polling)"""
+        req_data = self._await_exchange(self.server.whip_requests, request_id)
+        if req_data is None:
             return
         
-        if req_data['status'] == 'pending':
-            response = json.dumps({'status': 'pending'}).encode()
-            self.send_response(202)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', len(response))
-            self.end_headers()
-            self.wfile.write(response)
-        elif req_data['status'] == 'ready':
+        if req_data['status'] == 'ready':
             answer = req_data['answer'].encode()
-            self.send_response(200)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/sdp')
-            self.send_header('Content-Length', len(answer))
-            self.end_headers()
-            self.wfile.write(answer)
-            del self.server.whip_requests[request_id]
+            self._send_bytes(answer, 'application/sdp')
         else:
             error = (req_data['error'] or 'Unknown error').encode()
-            self.send_response(500)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'text/plain')
-            self.send_header('Content-Length', len(error))
-            self.end_headers()
-            self.wfile.write(error)
-            del self.server.whip_requests[request_id]
+            self._send_bytes(error, 'text/plain', status=500)
+    
+    def _await_exchange(self, requests: Dict[str, dict], request_id: str) -> Optional[dict]:
+        """
+        Long-poll an SDP exchange: hold the request until it finishes or
+        LONG_POLL_TIMEOUT passes. Returns the finished entry (removed from
+        requests), or None after answering 404 (unknown ID) or 202 (still pending).
+        """
+        req_data = requests.get(request_id)
+        if not req_data:
+            self.send_error(404, "Request not found")
+            return None
+        
+        if not req_data['event'].wait(LONG_POLL_TIMEOUT):
+            self._send_bytes(_PENDING_JSON, status=202)
+            return None
+        
+        requests.pop(request_id, None)
+        return req_data
     
     def _handle_scope_offer(self, body: bytes):
         """Proxy WebRTC offer to Scope (bidirectional - sends video, receives processed)"""
         if not self.server.scope_url:
             self.send_error(404, "No Scope URL configured")
             return
+        if self._too_many_requests(self.server.scope_requests):
+            return
         
         try:
-            payload = json.loads(body.decode('utf-8'))
+            payload = _loads(body)
             offer_sdp = payload.get('sdp', '')
             
-            request_id = secrets.token_urlsafe(8)
+            request_id = _gen_request_id()
             
-            self.server.scope_requests[request_id] = {
+            req_data = self.server.scope_requests[request_id] = {
                 'status': 'pending',
                 'answer': None,
                 'session_id': None,
-                'error': None
+                'error': None,
+                'event': threading.Event(),
+                'created': time.monotonic()
             }
             
             def exchange_async():
                 try:
-                    from scope_client import ScopeClient
-                    client = ScopeClient(self.server.scope_url)
+                    # Own session state per offer; the opener and ICE cache are shared
+                    client = self.server._get_scope_client().session()
                     
                     # Get pipeline_id (pipeline should already be loaded by app.py)
                     pipeline_id = "streamdiffusionv2"  # default
@@ -606,77 +912,47 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
                     
                     answer = client.send_offer(offer_sdp, sdp_type="offer", initial_params=initial_params)
                     
-                    self.server.scope_requests[request_id]['answer'] = answer.get('sdp', '')
-                    self.server.scope_requests[request_id]['session_id'] = answer.get('sessionId', '')
-                    self.server.scope_requests[request_id]['status'] = 'ready'
+                    req_data['answer'] = answer.get('sdp', '')
+                    req_data['session_id'] = answer.get('sessionId', '')
+                    req_data['status'] = 'ready'
                     
                 except Exception as e:
                     import traceback
                     traceback.print_exc()
-                    self.server.scope_requests[request_id]['error'] = str(e)
-                    self.server.scope_requests[request_id]['status'] = 'error'
+                    req_data['error'] = str(e)
+                    req_data['status'] = 'error'
+                finally:
+                    req_data['event'].set()
             
-            threading.Thread(target=exchange_async, daemon=True).start()
+            self.server._exchange_pool.submit(exchange_async)
             
-            response = json.dumps({'id': request_id}).encode()
-            self.send_response(202)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', len(response))
-            self.end_headers()
-            self.wfile.write(response)
+            response = _dumps({'id': request_id})
+            self._send_bytes(response, status=202)
             
         except Exception as e:
             error = str(e).encode()
-            self.send_response(500)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'text/plain')
-            self.send_header('Content-Length', len(error))
-            self.end_headers()
-            self.wfile.write(error)
+            self._send_bytes(error, 'text/plain', status=500)
     
     def _serve_scope_result(self, request_id: str):
-        """Serve Scope WebRTC result (polling)"""
-        req_data = self.server.scope_requests.get(request_id)
-        
-        if not req_data:
-            self.send_error(404, "Request not found")
+        """Serve Scope WebRTC result (long-polling)"""
+        req_data = self._await_exchange(self.server.scope_requests, request_id)
+        if req_data is None:
             return
         
-        if req_data['status'] == 'pending':
-            response = json.dumps({'status': 'pending'}).encode()
-            self.send_response(202)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', len(response))
-            self.end_headers()
-            self.wfile.write(response)
-        elif req_data['status'] == 'ready':
-            response = json.dumps({
+        if req_data['status'] == 'ready':
+            response = _dumps({
                 'sdp': req_data['answer'],
                 'sessionId': req_data['session_id']
-            }).encode()
-            self.send_response(200)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', len(response))
-            self.end_headers()
-            self.wfile.write(response)
-            del self.server.scope_requests[request_id]
+            })
+            self._send_bytes(response)
         else:
-            error = json.dumps({'error': req_data['error'] or 'Unknown error'}).encode()
-            self.send_response(500)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', len(error))
-            self.end_headers()
-            self.wfile.write(error)
-            del self.server.scope_requests[request_id]
+            error = _dumps({'error': req_data['error'] or 'Unknown error'})
+            self._send_bytes(error, status=500)
     
     def _handle_scope_ice_candidate(self, body: bytes):
         """Proxy ICE candidate to Scope (trickle ICE)"""
         try:
-            payload = json.loads(body.decode('utf-8'))
+            payload = _loads(body)
             session_id = payload.get('sessionId')
             candidate = payload.get('candidate')
             sdp_mid = payload.get('sdpMid')
@@ -685,42 +961,34 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
             if not session_id or not candidate:
                 raise ValueError("Missing sessionId or candidate")
             
-            from scope_client import ScopeClient
-            client = ScopeClient(self.server.scope_url)
-            client.session_id = session_id  # Set the session ID
-            client.send_ice_candidate(candidate, sdp_mid, sdp_mline_index)
+            client = self.server._get_scope_client()
+            client.send_ice_candidate(candidate, sdp_mid, sdp_mline_index, session_id=session_id)
             
-            response = json.dumps({'success': True}).encode()
-            self.send_response(200)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', len(response))
-            self.end_headers()
-            self.wfile.write(response)
+            response = _dumps({'success': True})
+            self._send_bytes(response)
             
         except Exception as e:
-            error = json.dumps({'error': str(e)}).encode()
-            self.send_response(500)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', len(error))
-            self.end_headers()
-            self.wfile.write(error)
+            error = _dumps({'error': str(e)})
+            self._send_bytes(error, status=500)
     
     def _handle_whep_proxy(self, body: bytes):
         """Proxy WHEP offer"""
         if not self.server.whep_url:
             self.send_error(404, "No WHEP URL available yet")
             return
+        if self._too_many_requests(self.server.whep_requests):
+            return
         
         offer_sdp = body.decode('utf-8')
-        request_id = secrets.token_urlsafe(8)
+        request_id = _gen_request_id()
         
-        self.server.whep_requests[request_id] = {
+        req_data = self.server.whep_requests[request_id] = {
             'status': 'pending',
             'offer': offer_sdp,
             'answer': None,
-            'error': None
+            'error': None,
+            'event': threading.Event(),
+            'created': time.monotonic()
         }
         
         def exchange_async():
@@ -730,56 +998,31 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
                     offer_sdp,
                     timeout=5
                 )
-                self.server.whep_requests[request_id]['answer'] = answer_sdp
-                self.server.whep_requests[request_id]['status'] = 'ready'
+                req_data['answer'] = answer_sdp
+                req_data['status'] = 'ready'
             except Exception as e:
-                self.server.whep_requests[request_id]['error'] = str(e)
-                self.server.whep_requests[request_id]['status'] = 'error'
+                req_data['error'] = str(e)
+                req_data['status'] = 'error'
+            finally:
+                req_data['event'].set()
         
-        threading.Thread(target=exchange_async, daemon=True).start()
+        self.server._exchange_pool.submit(exchange_async)
         
-        response = json.dumps({'id': request_id}).encode()
-        self.send_response(202)
-        self._send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(response))
-        self.end_headers()
-        self.wfile.write(response)
+        response = _dumps({'id': request_id})
+        self._send_bytes(response, status=202)
     
     def _serve_whep_result(self, request_id: str):
-        """Serve WHEP result (polling)"""
-        req_data = self.server.whep_requests.get(request_id)
-        
-        if not req_data:
-            self.send_error(404, "Request not found")
+        """Serve WHEP result (long-polling)"""
+        req_data = self._await_exchange(self.server.whep_requests, request_id)
+        if req_data is None:
             return
         
-        if req_data['status'] == 'pending':
-            response = json.dumps({'status': 'pending'}).encode()
-            self.send_response(202)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Content-Length', len(response))
-            self.end_headers()
-            self.wfile.write(response)
-        elif req_data['status'] == 'ready':
+        if req_data['status'] == 'ready':
             answer = req_data['answer'].encode()
-            self.send_response(200)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'application/sdp')
-            self.send_header('Content-Length', len(answer))
-            self.end_headers()
-            self.wfile.write(answer)
-            del self.server.whep_requests[request_id]
+            self._send_bytes(answer, 'application/sdp')
         else:
             error = (req_data['error'] or 'Unknown error').encode()
-            self.send_response(500)
-            self._send_cors_headers()
-            self.send_header('Content-Type', 'text/plain')
-            self.send_header('Content-Length', len(error))
-            self.end_headers()
-            self.wfile.write(error)
-            del self.server.whep_requests[request_id]
+            self._send_bytes(error, 'text/plain', status=500)
     
     def _handle_websocket_upgrade(self):
         """Upgrade connection to WebSocket"""
@@ -793,36 +1036,86 @@ class DaydreamHTTPHandler(http.server.BaseHTTPRequestHandler):
         handshake = ws.do_handshake(headers)
         self.wfile.write(handshake)
         
+        # The writer thread must never block on one client, so the socket goes
+        # non-blocking; this thread waits for incoming data with a selector
+        self.request.setblocking(False)
+        readable = selectors.DefaultSelector()
+        readable.register(self.request, selectors.EVENT_READ)
+        
         # Register client
-        self.server.ws_clients.add(self.request)
-        print(f"WebSocket client connected ({len(self.server.ws_clients)} total)")
+        client = _WSClient(self.request)
+        with self.server._ws_lock:
+            self.server.ws_clients = self.server.ws_clients | {client}
+        logger.info("WebSocket client connected (%d total)", len(self.server.ws_clients))
         
         try:
-            # Keep connection open
-            buffer = b''
+            # Keep connection open. Reads land in one preallocated buffer and
+            # frames are parsed in place between the read and write cursors.
+            buf = bytearray(65536)
+            view = memoryview(buf)
+            rpos = wpos = 0
             while True:
                 try:
-                    data = self.request.recv(4096)
-                    if not data:
+                    if wpos == len(buf):
+                        if rpos:
+                            # Move the unparsed tail to the front
+                            buf[:wpos - rpos] = buf[rpos:wpos]
+                            wpos -= rpos
+                            rpos = 0
+                        elif WebSocketHandler.frame_size(view[:wpos]) > MAX_BODY:
+                            self.server._ws_close(client, 1009)  # Message too big
+                            self._ws_discard_until_closed(readable)
+                            break
+                        else:
+                            # A single frame larger than the buffer: grow it
+                            view.release()
+                            buf.extend(bytes(len(buf)))
+                            view = memoryview(buf)
+                    
+                    readable.select()
+                    try:
+                        n = self.request.recv_into(view[wpos:])
+                    except BlockingIOError:
+                        continue
+                    if not n:
                         break
-                    buffer += data
+                    wpos += n
                     
-                    while buffer:
-                        opcode, payload, consumed = WebSocketHandler.decode_frame(buffer)
+                    while rpos < wpos:
+                        # Only control frames matter; the relay never sends data to us
+                        opcode, payload, rpos = WebSocketHandler.decode_frame(view[:wpos], control_only=True, start=rpos)
                         if opcode is None:
                             break
-                        buffer = buffer[consumed:]
                         
                         if opcode == 0x08:  # Close
                             break
                         elif opcode == 0x09:  # Ping
+                            # Queued behind any frame mid-write so bytes never interleave
                             pong = WebSocketHandler.encode_frame(payload, 0x0A)
-                            self.request.sendall(pong)
+                            self.server._ws_queue_control(client, pong)
+                    
+                    if rpos == wpos:
+                        rpos = wpos = 0
                 except:
                     break
         finally:
-            self.server.ws_clients.discard(self.request)
-            print(f"WebSocket client disconnected ({len(self.server.ws_clients)} total)")
+            readable.close()
+            self.server._ws_drop(client)
+            logger.info("WebSocket client disconnected (%d total)", len(self.server.ws_clients))
+    
+    def _ws_discard_until_closed(self, readable: selectors.BaseSelector):
+        """After queueing a Close frame, drop input until the peer hangs up or WS_CLOSE_TIMEOUT passes"""
+        scratch = bytearray(65536)
+        deadline = time.monotonic() + WS_CLOSE_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not readable.select(remaining):
+                return
+            try:
+                if not self.request.recv_into(scratch):
+                    return
+            except BlockingIOError:
+                pass
 
 
 class DaydreamServer(socketserver.ThreadingTCPServer):
@@ -830,6 +1123,7 @@ class DaydreamServer(socketserver.ThreadingTCPServer):
     
     allow_reuse_address = True
     daemon_threads = True
+    request_queue_size = 128
     
     def __init__(self, port: int, api: DaydreamAPI, sdp_port: int):
         super().__init__(('127.0.0.1', port), DaydreamHTTPHandler)
@@ -850,47 +1144,249 @@ class DaydreamServer(socketserver.ThreadingTCPServer):
         self.backend_mode = 'daydream'
         self.scope_url = None
         
+        # Notified on stream state changes; /events streams wait on it
+        self._state_cond = threading.Condition()
+        
         # Request tracking
         self.whip_requests: Dict[str, dict] = {}
         self.whep_requests: Dict[str, dict] = {}
         self.scope_requests: Dict[str, dict] = {}
+        self._reaper_stop = threading.Event()
+        threading.Thread(target=self._reap_requests_loop, name='request-reaper', daemon=True).start()
+        
+        # Background SDP exchanges (WHIP/WHEP/Scope offers) share one bounded pool
+        self._exchange_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='sdp-exchange')
         
         # WebSocket clients
-        self.ws_clients: Set = set()
+        # Immutable snapshot, replaced (under _ws_lock) on connect/disconnect so
+        # the per-frame readers can use it without locking
+        self.ws_clients: FrozenSet[_WSClient] = frozenset()
         self._ws_lock = threading.Lock()
         
-        # Relay HTML cache
-        self._relay_html_cache = None
+        # (frame buffer, (header, payload) views) of the last broadcast frame
+        self._last_frame = (None, None)
+        
+        # One writer thread sends to every WebSocket client: broadcast_frame only
+        # queues and wakes it through a socketpair, sockets it can't fill right
+        # away wait in the selector for EVENT_WRITE
+        self._io = selectors.DefaultSelector()
+        self._io_lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._io.register(self._wake_r, selectors.EVENT_READ)
+        self._ws_writer_running = True
+        self._ws_writer = threading.Thread(target=self._ws_writer_loop, name='ws-writer', daemon=True)
+        self._ws_writer.start()
+        
+        # Relay HTML, rendered and encoded once for this server's SDP port
+        relay_html = RELAY_HTML.replace('{{SDP_PORT}}', str(self.sdp_port)).encode('utf-8')
+        self._relay_responses = _html_responses(relay_html, gzip.compress(relay_html, 9))
+        
+        # Serialized JSON caches: (state fields, body, ETag) and (sources rev, body)
+        self._status_json = None
+        self._api_status_json = None
+        self._ndi_sources_json = None
+        
+        # Status ETags are "<server start>-<revision>": the revision is bumped
+        # each time a status body is re-serialized, the start time keeps a
+        # restarted server from matching an ETag cached against the old one
+        self._etag_base = '%x' % time.time_ns()
+        self._status_rev = itertools.count(1)
+        
+        # ScopeClient for the configured Scope URL, shared by all handler threads
+        self._scope_client = None
+        self._scope_client_lock = threading.Lock()
+        
+        # Connection threads are reused: finished ones park on _conn_queue
+        # instead of exiting, so short requests don't pay for a new thread
+        self._conn_queue = queue.SimpleQueue()
+        self._idle_workers = 0
+        self._workers_lock = threading.Lock()
     
-    def get_relay_html(self) -> bytes:
-        """Get the relay HTML page with SDP port substituted"""
-        if self._relay_html_cache is None:
-            self._relay_html_cache = RELAY_HTML.replace(
-                '{{SDP_PORT}}', str(self.sdp_port)
-            ).encode('utf-8')
-        return self._relay_html_cache
+    def server_close(self):
+        super().server_close()
+        # TCPServer.__init__ calls server_close() when bind fails, before any of
+        # the resources below exist, so each one is checked first
+        pool = getattr(self, '_exchange_pool', None)
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if getattr(self, '_wake_w', None) is not None:
+            # Stop the writer before closing the selector and wakeup sockets it uses
+            self._ws_writer_running = False
+            self._wake_writer()
+            self._ws_writer.join()
+            self._io.close()
+            self._wake_r.close()
+            self._wake_w.close()
+        reaper_stop = getattr(self, '_reaper_stop', None)
+        if reaper_stop is not None:
+            reaper_stop.set()
+        workers_lock = getattr(self, '_workers_lock', None)
+        if workers_lock is not None:
+            with workers_lock:
+                idle, self._idle_workers = self._idle_workers, 0
+            for _ in range(idle):
+                self._conn_queue.put(None)
+    
+    def process_request(self, request, client_address):
+        """Hand the connection to an idle worker thread, starting one if none is free"""
+        with self._workers_lock:
+            spawn = self._idle_workers == 0
+            if not spawn:
+                self._idle_workers -= 1
+        self._conn_queue.put((request, client_address))
+        if spawn:
+            threading.Thread(target=self._conn_worker, name='http-conn', daemon=True).start()
+    
+    def _conn_worker(self):
+        """Serve queued connections, parking between them up to IDLE_CONN_WORKERS"""
+        while True:
+            job = self._conn_queue.get()
+            if job is None:
+                return
+            self.process_request_thread(*job)
+            with self._workers_lock:
+                if self._idle_workers >= IDLE_CONN_WORKERS:
+                    return
+                self._idle_workers += 1
+    
+    def _reap_requests_loop(self):
+        """Periodically drop SDP exchange results older than REQUEST_TTL"""
+        while not self._reaper_stop.wait(REQUEST_TTL / 2):
+            cutoff = time.monotonic() - REQUEST_TTL
+            for requests in (self.whip_requests, self.whep_requests, self.scope_requests):
+                # Dicts keep insertion (= creation) order: stop at the first live entry
+                for request_id, req_data in list(requests.items()):
+                    if req_data['created'] > cutoff:
+                        break
+                    requests.pop(request_id, None)
+    
+    def _get_scope_client(self, url: Optional[str] = None):
+        """Get the shared ScopeClient for the configured Scope URL (other URLs get an uncached one)"""
+        from scope_client import ScopeClient
+        scope_url = self.scope_url
+        url = url or scope_url
+        if url != scope_url:
+            return ScopeClient(url)
+        with self._scope_client_lock:
+            client = self._scope_client
+            if client is None or client.scope_url != url.rstrip('/'):
+                client = self._scope_client = ScopeClient(url)
+        return client
     
     def broadcast_frame(self, jpeg_data: bytes):
-        """Send a JPEG frame to all connected WebSocket clients"""
-        with self._ws_lock:
-            clients = list(self.ws_clients)
-        
+        """Queue a JPEG frame for all connected WebSocket clients"""
+        clients = self.ws_clients
         if not clients:
             return
         
-        frame = WebSocketHandler.encode_frame(jpeg_data, 0x02)  # Binary
+        # Payload is sent as-is after the header; no header + data copy.
+        # Re-broadcasting the same buffer (e.g. a held frame) reuses its views.
+        last_data, frame = self._last_frame
+        if jpeg_data is not last_data:
+            payload = memoryview(jpeg_data).cast('B').toreadonly()
+            header = memoryview(WebSocketHandler.encode_header(len(payload), 0x02))  # Binary
+            frame = (header, payload)
+            self._last_frame = (jpeg_data, frame)
         
-        dead_clients = []
         for client in clients:
+            client.frames.append(frame)
+        self._wake_writer()
+    
+    def _ws_queue_control(self, client: _WSClient, frame: bytes):
+        """Queue a control frame (e.g. pong) ahead of pending video frames"""
+        client.control.append(frame)
+        self._wake_writer()
+    
+    def _next_etag(self) -> str:
+        """ETag for a newly serialized status body"""
+        return '"%s-%d"' % (self._etag_base, next(self._status_rev))
+    
+    def _ws_close(self, client: _WSClient, code: int):
+        """Queue a Close frame with the given status code; no video is sent after it"""
+        client.closing = True
+        client.frames.clear()
+        self._ws_queue_control(client, WebSocketHandler.encode_frame(struct.pack('!H', code), 0x08))
+    
+    def _ws_drop(self, client: _WSClient):
+        """Forget a WebSocket client (safe to call more than once)"""
+        client.closed = True
+        with self._ws_lock:
+            self.ws_clients = self.ws_clients - {client}
+        with self._io_lock:
+            if client.waiting:
+                client.waiting = False
+                try:
+                    self._io.unregister(client.sock)
+                except (KeyError, ValueError):
+                    pass
+    
+    def _wake_writer(self):
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass  # Wakeup already pending (buffer full) or server closed
+    
+    def _ws_writer_loop(self):
+        """Writer thread: flush queued frames to clients as their sockets accept them"""
+        while self._ws_writer_running:
+            for key, _ in self._io.select():
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    for client in self.ws_clients:
+                        if not client.waiting:
+                            self._ws_flush(client)
+                else:
+                    self._ws_flush(key.data)
+    
+    def _ws_flush(self, client: _WSClient):
+        """Write a client's queued frames until done or its send buffer is full"""
+        while not client.closed:
+            out = client.out
+            if not out:
+                # Pending control frames (pongs) go first, in the same
+                # sendmsg as the next video frame
+                while client.control:
+                    out.append(memoryview(client.control.popleft()))
+                if client.frames and not client.closing:
+                    out.extend(client.frames.popleft())
+                if not out:
+                    break
+            
             try:
-                client.sendall(frame)
-            except:
-                dead_clients.append(client)
-        
-        if dead_clients:
-            with self._ws_lock:
-                for client in dead_clients:
-                    self.ws_clients.discard(client)
+                sent = _send_nowait(client.sock, out)
+            except BlockingIOError:
+                # Kernel buffer full: resume when the socket becomes writable
+                with self._io_lock:
+                    if not client.waiting and not client.closed:
+                        self._io.register(client.sock, selectors.EVENT_WRITE, client)
+                        client.waiting = True
+                return
+            except OSError:
+                # Dead peer; wake its reader thread, which drops the client
+                self._ws_drop(client)
+                try:
+                    client.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                return
+            
+            # Drop fully written buffers and trim a partially written one
+            while out and sent >= len(out[0]):
+                sent -= len(out.pop(0))
+            if sent:
+                out[0] = out[0][sent:]
+        
+        if client.waiting:
+            with self._io_lock:
+                if client.waiting:
+                    client.waiting = False
+                    self._io.unregister(client.sock)
     
     def set_stream_info(self, stream_id: str, whip_url: str):
         """Update stream information (Daydream Cloud mode)"""
@@ -898,6 +1394,7 @@ class DaydreamServer(socketserver.ThreadingTCPServer):
         self.whip_url = whip_url
         self.backend_mode = 'daydream'
         self.state = "STREAMING"
+        self.notify_state_changed()
     
     def set_scope_info(self, scope_url: str, pipeline_id: str = "streamdiffusionv2"):
         """Update stream information (Scope mode)"""
@@ -906,6 +1403,7 @@ class DaydreamServer(socketserver.ThreadingTCPServer):
         self.backend_mode = 'scope'
         self.stream_id = 'scope-session'
         self.state = "STREAMING"
+        self.notify_state_changed()
     
     def clear_stream_info(self):
         """Clear stream information"""
@@ -916,6 +1414,12 @@ class DaydreamServer(socketserver.ThreadingTCPServer):
         self.scope_pipeline_id = None
         self.backend_mode = 'daydream'
         self.state = "IDLE"
+        self.notify_state_changed()
+    
+    def notify_state_changed(self):
+        """Wake /events streams so they push the new status"""
+        with self._state_cond:
+            self._state_cond.notify_all()
 
 
 # Minimal relay HTML - handles WebRTC WHIP/WHEP
@@ -1012,7 +1516,7 @@ RELAY_HTML = '''<!DOCTYPE html>
             
             ws.onopen = () => {
                 console.log('[Relay] WebSocket connected');
-                pollStatus();
+                watchStatus();
             };
             
             ws.onmessage = (e) => {
@@ -1047,6 +1551,42 @@ RELAY_HTML = '''<!DOCTYPE html>
                 });
         }
         
+        // Follow server status: pushed over /events, polled if EventSource is missing.
+        // One stream per page: later calls (WebSocket reconnects, retries) reuse
+        // it while it's open, and at most one retry is pending.
+        let statusEvents = null;
+        let statusRetry = null;
+        
+        function watchStatus() {
+            clearTimeout(statusRetry);
+            statusRetry = null;
+            if (!window.EventSource) {
+                pollStatus();
+                return;
+            }
+            if (statusEvents && statusEvents.readyState !== EventSource.CLOSED) return;
+            const events = statusEvents = new EventSource('/events');
+            events.addEventListener('state', async (e) => {
+                const status = JSON.parse(e.data);
+                if (status.state !== 'STREAMING') return;
+                if (!(status.backend_mode === 'scope' && status.scope_url) && !status.whip_url) return;
+                events.close();
+                if (statusEvents === events) statusEvents = null;
+                try {
+                    if (status.backend_mode === 'scope' && status.scope_url) {
+                        setStatus('Connecting to Scope...');
+                        await startScope();
+                    } else {
+                        setStatus('Starting WHIP...');
+                        await startWHIP();
+                    }
+                } catch (err) {
+                    clearTimeout(statusRetry);
+                    statusRetry = setTimeout(watchStatus, 1000);
+                }
+            });
+        }
+        
         // Poll server status
         async function pollStatus() {
             try {
@@ -1115,8 +1655,7 @@ RELAY_HTML = '''<!DOCTYPE html>
                 const resp = await fetch(`http://${location.hostname}:${SDP_PORT}/whip/result/${requestId}`);
                 
                 if (resp.status === 202) {
-                    await new Promise(r => setTimeout(r, 100));
-                    continue;
+                    continue;  // server held the poll until its timeout; ask again
                 }
                 
                 if (resp.ok) {
@@ -1319,8 +1858,7 @@ RELAY_HTML = '''<!DOCTYPE html>
                 const resp = await fetch(`http://${location.hostname}:${SDP_PORT}/scope/result/${requestId}`);
                 
                 if (resp.status === 202) {
-                    await new Promise(r => setTimeout(r, 100));
-                    continue;
+                    continue;  // server held the poll until its timeout; ask again
                 }
                 
                 if (resp.ok) {
@@ -1337,38 +1875,71 @@ RELAY_HTML = '''<!DOCTYPE html>
             }
         }
         
-        function setH264Preference(transceiver) {
+        // H.264 preference order: constrained baseline 3.1 (42e01f), other
+        // constrained baseline (42e0xx), other baseline (42xxxx); 3 = higher
+        // profiles, only used when no baseline entry exists; -1 = not H.264
+        function h264Rank(codec) {
+            if (codec.mimeType.toLowerCase() !== 'video/h264') return -1;
+            const m = /profile-level-id=(42[0-9a-f]{4})/i.exec(codec.sdpFmtpLine || '');
+            if (!m) return 3;
+            const id = m[1].toLowerCase();
+            return id === '42e01f' ? 0 : id.startsWith('42e0') ? 1 : 2;
+        }
+        
+        // Video codecs with H.264 moved to the front (others kept as fallback),
+        // looked up once per page for each direction
+        const h264FirstCodecs = {};
+        
+        function setH264Preference(transceiver, receiving = false) {
             if (!transceiver.setCodecPreferences) return;
             try {
-                const caps = RTCRtpSender.getCapabilities('video');
-                if (!caps?.codecs?.length) return;
-                const h264 = caps.codecs.filter(c => c.mimeType.toLowerCase().includes('h264'));
-                if (h264.length) transceiver.setCodecPreferences(h264);
+                const key = receiving ? 'recv' : 'send';
+                if (!h264FirstCodecs[key]) {
+                    const caps = (receiving ? RTCRtpReceiver : RTCRtpSender).getCapabilities('video');
+                    const codecs = caps?.codecs || [];
+                    const ranked = codecs.map(c => [h264Rank(c), c]);
+                    let h264 = ranked.filter(([rank]) => rank >= 0 && rank < 3);
+                    if (!h264.length) h264 = ranked.filter(([rank]) => rank === 3);
+                    h264 = h264.sort((a, b) => a[0] - b[0]).map(([, c]) => c);
+                    h264FirstCodecs[key] = h264.length
+                        ? [...h264, ...codecs.filter(c => h264Rank(c) < 0)]
+                        : [];
+                }
+                if (h264FirstCodecs[key].length) transceiver.setCodecPreferences(h264FirstCodecs[key]);
             } catch (e) {}
         }
         
         // WHEP connection (receive AI output)
         async function startWHEP() {
             let retries = 0;
+            let delay = 100;
             const maxRetries = 30;
             
+            // A new WHEP session never reuses a previous session's connection
+            if (whepPc) whepPc.close();
+            whepPc = null;
+            
             while (retries < maxRetries) {
                 try {
-                    whepPc = new RTCPeerConnection({
-                        iceServers: [{ urls: 'stun:stun.l.google.com:19302' }]
-                    });
-                    
-                    whepPc.ontrack = (e) => {
-                        console.log('[Relay] WHEP track:', e.track.kind);
-                        if (e.track.kind === 'video') {
-                            video.srcObject = e.streams[0] || new MediaStream([e.track]);
-                        }
-                    };
-                    
-                    whepPc.addTransceiver('video', { direction: 'recvonly' });
-                    whepPc.addTransceiver('audio', { direction: 'recvonly' });
+                    // One peer connection (one ICE gathering pass) serves every
+                    // attempt; retries only re-offer on it
+                    if (!whepPc) {
+                        whepPc = new RTCPeerConnection({
+                            iceServers: [{ urls: 'stun:stun.l.google.com:19302' }]
+                        });
+                        
+                        whepPc.ontrack = (e) => {
+                            console.log('[Relay] WHEP track:', e.track.kind);
+                            if (e.track.kind === 'video') {
+                                video.srcObject = e.streams[0] || new MediaStream([e.track]);
+                            }
+                        };
+                        
+                        setH264Preference(whepPc.addTransceiver('video', { direction: 'recvonly' }), true);
+                        whepPc.addTransceiver('audio', { direction: 'recvonly' });
+                    }
                     
-                    const offer = await whepPc.createOffer();
+                    const offer = await whepPc.createOffer({ iceRestart: whepPc.iceConnectionState !== 'new' });
                     await whepPc.setLocalDescription(offer);
                     
                     const resp = await fetch(WHEP_URL, {
@@ -1389,8 +1960,15 @@ RELAY_HTML = '''<!DOCTYPE html>
                     
                     throw new Error('WHEP not ready');
                 } catch (e) {
+                    // Only a failed connection is torn down and rebuilt next attempt
+                    if (whepPc && whepPc.connectionState === 'failed') {
+                        whepPc.close();
+                        whepPc = null;
+                    }
                     retries++;
-                    await new Promise(r => setTimeout(r, 200));
+                    // Exponential backoff with jitter, capped at 3 s
+                    await new Promise(r => setTimeout(r, delay + Math.random() * delay));
+                    delay = Math.min(delay * 2, 3000);
                 }
             }
         }
@@ -1400,8 +1978,7 @@ RELAY_HTML = '''<!DOCTYPE html>
                 const resp = await fetch(`http://${location.hostname}:${SDP_PORT}/whep/result/${requestId}`);
                 
                 if (resp.status === 202) {
-                    await new Promise(r => setTimeout(r, 100));
-                    continue;
+                    continue;  // server held the poll until its timeout; ask again
                 }
                 
                 if (resp.ok) {
@@ -1442,10 +2019,14 @@ if __name__ == '__main__':
     from daydream_api import DaydreamAPI
     
     api = DaydreamAPI()
-    port = find_free_port()
-    sdp_port = find_free_port()
+    port, sdp_port = find_free_ports(2)
     
-    server = DaydreamServer(port, api, sdp_port)
+    try:
+        server = DaydreamServer(port, api, sdp_port)
+    except OSError:
+        # Lost the race for the port between picking and binding: pick again once
+        port, sdp_port = find_free_ports(2)
+        server = DaydreamServer(port, api, sdp_port)
     
     print(f"Server running on http://localhost:{port}")
     print(f"SDP proxy on port {sdp_port}")